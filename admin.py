@@ -1,13 +1,31 @@
 # admin.py - UPDATED
-from flask import Blueprint, render_template, jsonify, request
+import csv
+import io
+import json
+from flask import Blueprint, Response, render_template, jsonify, request, current_app, stream_with_context
 from flask_login import login_required, current_user
-from models import db, User, Court, Equipment, Coach, Booking, BookingEquipment, PricingRule
-from decorators import admin_required  # Changed import
+from models import db, User, Court, Equipment, Coach, Booking, BookingEquipment, BookingRollup, PricingRule, SlotHold
+from decorators import admin_required, query_budget  # Changed import
+from bookings import delete_bookings, bookings_removed
+import reports
+from catalog import catalog_cache
+from pricing import parse_apply_days
+from pagination import encode_cursor, decode_cursor
+from instrumentation import request_log
 from datetime import datetime, date
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 
+def booking_counts(column):
+    """Subquery of total and upcoming booking counts grouped by a Booking column, exposed as key"""
+    return db.session.query(
+        column.label('key'),
+        db.func.count(Booking.id).label('total'),
+        db.func.sum(db.case((Booking.date >= date.today(), 1), else_=0)).label('upcoming')
+    ).group_by(column).subquery()
+
+
 # Admin Dashboard Routes
 @admin_bp.route('/')
 @login_required
@@ -20,26 +38,33 @@ def admin_dashboard():
 @admin_bp.route('/api/dashboard/stats')
 @login_required
 @admin_required
+@query_budget(5)
 def get_dashboard_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics from the daily rollups"""
+    today = date.today()
     total_users = User.query.count()
-    total_bookings = Booking.query.count()
-    active_bookings = Booking.query.filter(Booking.date >= date.today()).count()
-    total_revenue = db.session.query(db.func.sum(Booking.total_price)).scalar() or 0
 
-    # Today's bookings
-    today_bookings = Booking.query.filter_by(date=date.today()).count()
-
-    # Revenue by month (last 6 months)
-    six_months_ago = date.today().replace(
-        month=date.today().month - 6 if date.today().month > 6 else date.today().month + 6)
+    totals = db.session.query(
+        db.func.sum(BookingRollup.bookings),
+        db.func.sum(BookingRollup.revenue),
+        db.func.sum(db.case((BookingRollup.day >= today, BookingRollup.bookings), else_=0)),
+        db.func.sum(db.case((BookingRollup.day == today, BookingRollup.bookings), else_=0))
+    ).filter(BookingRollup.dimension == 'all').one()
+    total_bookings, total_revenue, active_bookings, today_bookings = (value or 0 for value in totals)
+
+    # Revenue by month (current month and the five before it)
+    month_index = today.year * 12 + today.month - 1 - 5
+    six_months_ago = date(month_index // 12, month_index % 12 + 1, 1)
     monthly_revenue = db.session.query(
-        db.func.strftime('%Y-%m', Booking.date),
-        db.func.sum(Booking.total_price)
-    ).filter(Booking.date >= six_months_ago).group_by(
-        db.func.strftime('%Y-%m', Booking.date)
+        db.func.strftime('%Y-%m', BookingRollup.day),
+        db.func.sum(BookingRollup.revenue)
+    ).filter(
+        BookingRollup.dimension == 'all',
+        BookingRollup.day >= six_months_ago
+    ).group_by(
+        db.func.strftime('%Y-%m', BookingRollup.day)
     ).order_by(
-        db.func.strftime('%Y-%m', Booking.date).desc()
+        db.func.strftime('%Y-%m', BookingRollup.day).desc()
     ).limit(6).all()
 
     return jsonify({
@@ -61,7 +86,10 @@ def get_users():
     per_page = request.args.get('per_page', 10, type=int)
     search = request.args.get('search', '')
 
-    query = User.query
+    counts = booking_counts(Booking.user_id)
+    query = db.session.query(User, db.func.coalesce(counts.c.total, 0)).outerjoin(
+        counts, counts.c.key == User.id
+    )
 
     if search:
         query = query.filter(
@@ -80,8 +108,8 @@ def get_users():
             'email': user.email,
             'isAdmin': user.is_admin,
             'createdAt': user.created_at.strftime('%Y-%m-%d %H:%M'),
-            'totalBookings': Booking.query.filter_by(user_id=user.id).count()
-        } for user in users.items],
+            'totalBookings': total_bookings
+        } for user, total_bookings in users.items],
         'total': users.total,
         'page': users.page,
         'per_page': users.per_page,
@@ -144,26 +172,28 @@ def manage_user(user_id):
         if user.id == current_user.id:
             return jsonify({'success': False, 'message': 'Cannot delete yourself'}), 400
 
-        # Delete user's bookings first
-        Booking.query.filter_by(user_id=user_id).delete()
+        # Delete user's bookings and holds first
+        removed = delete_bookings(Booking.user_id == user_id)
+        SlotHold.query.filter_by(user_id=user_id).delete(synchronize_session=False)
 
         db.session.delete(user)
         db.session.commit()
+        bookings_removed(removed)
         return jsonify({'success': True, 'message': 'User deleted successfully'})
 
 
-@admin_bp.route('/api/bookings')
-@login_required
-@admin_required
-def get_all_bookings():
-    """Get all bookings with filters"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+def filtered_bookings_query():
+    """Bookings matching the status/date/search filters of the request, with related rows loaded up front"""
     status = request.args.get('status', 'all')  # all, upcoming, past
     date_filter = request.args.get('date', '')
     search = request.args.get('search', '')
 
-    query = Booking.query.join(User).join(Court)
+    query = Booking.query.join(User).join(Court).options(
+        db.contains_eager(Booking.user),
+        db.contains_eager(Booking.court),
+        db.joinedload(Booking.coach),
+        db.selectinload(Booking.equipment).joinedload(BookingEquipment.equipment_item)
+    )
 
     # Apply filters
     if status == 'upcoming':
@@ -180,42 +210,46 @@ def get_all_bookings():
             (Court.name.ilike(f'%{search}%'))
         )
 
-    bookings = query.order_by(Booking.date.desc(), Booking.time_slot).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    return query
+
+
+def serialize_booking_row(booking):
+    return {
+        'id': booking.id,
+        'date': booking.date.strftime('%Y-%m-%d'),
+        'timeSlot': booking.time_slot,
+        'user': {
+            'id': booking.user.id,
+            'username': booking.user.username,
+            'email': booking.user.email
+        },
+        'court': {
+            'id': booking.court.id,
+            'name': booking.court.name,
+            'type': booking.court.type
+        },
+        'coach': booking.coach.name if booking.coach else None,
+        'equipment': [f'{be.equipment_item.name} x{be.quantity}' for be in booking.equipment],
+        'totalPrice': booking.total_price,
+        'createdAt': booking.created_at.strftime('%Y-%m-%d %H:%M')
+    }
 
-    booking_list = []
-    for booking in bookings.items:
-        # Get equipment for this booking
-        booking_equipment = BookingEquipment.query.filter_by(booking_id=booking.id).all()
-        equipment_details = []
-        for be in booking_equipment:
-            eq = Equipment.query.get(be.equipment_id)
-            if eq:
-                equipment_details.append(f'{eq.name} x{be.quantity}')
 
-        booking_list.append({
-            'id': booking.id,
-            'date': booking.date.strftime('%Y-%m-%d'),
-            'timeSlot': booking.time_slot,
-            'user': {
-                'id': booking.user.id,
-                'username': booking.user.username,
-                'email': booking.user.email
-            },
-            'court': {
-                'id': booking.court.id,
-                'name': booking.court.name,
-                'type': booking.court.type
-            },
-            'coach': booking.coach.name if booking.coach else None,
-            'equipment': equipment_details,
-            'totalPrice': booking.total_price,
-            'createdAt': booking.created_at.strftime('%Y-%m-%d %H:%M')
-        })
+@admin_bp.route('/api/bookings')
+@login_required
+@admin_required
+@query_budget(5)
+def get_all_bookings():
+    """Get all bookings with filters"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+
+    bookings = filtered_bookings_query().order_by(Booking.date.desc(), Booking.time_slot).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
 
     return jsonify({
-        'bookings': booking_list,
+        'bookings': [serialize_booking_row(booking) for booking in bookings.items],
         'total': bookings.total,
         'page': bookings.page,
         'per_page': bookings.per_page,
@@ -223,6 +257,134 @@ def get_all_bookings():
     })
 
 
+@admin_bp.route('/api/bookings/cursor')
+@login_required
+@admin_required
+@query_budget(4)
+def get_bookings_by_cursor():
+    """Get bookings with filters, paged by an opaque cursor instead of an offset"""
+    per_page = max(1, min(request.args.get('per_page', 10, type=int), 500))
+    cursor = request.args.get('cursor')
+
+    query = filtered_bookings_query()
+
+    # Keyset on the listing order: date descending, then time slot and id ascending
+    if cursor:
+        try:
+            cursor_date, cursor_slot, cursor_id = decode_cursor(cursor)
+            cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+            cursor_id = int(cursor_id)
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+        query = query.filter(
+            (Booking.date < cursor_date) |
+            ((Booking.date == cursor_date) & (
+                (Booking.time_slot > cursor_slot) |
+                ((Booking.time_slot == cursor_slot) & (Booking.id > cursor_id))
+            ))
+        )
+
+    # Fetch one extra row to know whether another page exists
+    bookings = query.order_by(
+        Booking.date.desc(), Booking.time_slot, Booking.id
+    ).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(bookings) > per_page:
+        bookings = bookings[:per_page]
+        last = bookings[-1]
+        next_cursor = encode_cursor([last.date.strftime('%Y-%m-%d'), last.time_slot, last.id])
+
+    return jsonify({
+        'bookings': [serialize_booking_row(booking) for booking in bookings],
+        'per_page': per_page,
+        'next_cursor': next_cursor
+    })
+
+
+# Bookings loaded per round trip, and per chunk sent, by the export
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ['id', 'date', 'time_slot', 'user_id', 'username', 'email', 'court_id', 'court', 'court_type',
+                  'coach', 'equipment', 'total_price', 'created_at']
+
+
+def csv_text(value):
+    """Keep user-entered text from being read as a formula by spreadsheet apps"""
+    if value and value[0] in '=+-@':
+        return "'" + value
+    return value
+
+
+def export_csv_row(booking):
+    return [
+        booking.id,
+        booking.date.strftime('%Y-%m-%d'),
+        booking.time_slot,
+        booking.user.id,
+        csv_text(booking.user.username),
+        csv_text(booking.user.email),
+        booking.court.id,
+        csv_text(booking.court.name),
+        booking.court.type,
+        csv_text(booking.coach.name) if booking.coach else '',
+        csv_text('; '.join(f'{be.equipment_item.name} x{be.quantity}' for be in booking.equipment)),
+        booking.total_price,
+        booking.created_at.strftime('%Y-%m-%d %H:%M')
+    ]
+
+
+@admin_bp.route('/api/bookings/export')
+@login_required
+@admin_required
+def export_bookings():
+    """Stream every booking matching the listing filters as CSV or NDJSON (format=csv|ndjson).
+
+    Rows are read EXPORT_BATCH_SIZE at a time from one cursor and sent as they
+    are serialized, so memory stays flat however much history is exported.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': 'Format must be csv or ndjson'}), 400
+
+    query = filtered_bookings_query().order_by(
+        Booking.date.desc(), Booking.time_slot, Booking.id
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(EXPORT_COLUMNS)
+            # The header goes out before the first query runs
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        for count, booking in enumerate(query, 1):
+            if export_format == 'csv':
+                writer.writerow(export_csv_row(booking))
+            else:
+                buffer.write(json.dumps(serialize_booking_row(booking)) + '\n')
+
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    filename = f'bookings-{date.today().strftime("%Y%m%d")}.{export_format}'
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
 @admin_bp.route('/api/bookings/<int:booking_id>', methods=['GET', 'DELETE'])
 @login_required
 @admin_required
@@ -269,11 +431,10 @@ def manage_booking(booking_id):
         })
 
     elif request.method == 'DELETE':
-        # Delete associated equipment bookings
-        BookingEquipment.query.filter_by(booking_id=booking_id).delete()
-
-        db.session.delete(booking)
+        # Delete the booking with its equipment lines
+        removed = delete_bookings(Booking.id == booking_id)
         db.session.commit()
+        bookings_removed(removed)
         return jsonify({'success': True, 'message': 'Booking deleted successfully'})
 
 
@@ -283,7 +444,10 @@ def manage_booking(booking_id):
 def manage_courts():
     """Get all courts or add new court"""
     if request.method == 'GET':
-        courts = Court.query.order_by(Court.name).all()
+        counts = booking_counts(Booking.court_id)
+        courts = db.session.query(Court, db.func.coalesce(counts.c.total, 0)).outerjoin(
+            counts, counts.c.key == Court.id
+        ).order_by(Court.name).all()
         return jsonify([{
             'id': court.id,
             'name': court.name,
@@ -291,8 +455,8 @@ def manage_courts():
             'basePrice': court.base_price,
             'isActive': court.is_active,
             'createdAt': court.created_at.strftime('%Y-%m-%d'),
-            'totalBookings': Booking.query.filter_by(court_id=court.id).count()
-        } for court in courts])
+            'totalBookings': total_bookings
+        } for court, total_bookings in courts])
 
     elif request.method == 'POST':
         data = request.get_json()
@@ -314,6 +478,7 @@ def manage_courts():
 
         db.session.add(court)
         db.session.commit()
+        catalog_cache.bump()
 
         return jsonify({
             'success': True,
@@ -343,6 +508,7 @@ def manage_court(court_id):
                 return jsonify({'success': False, 'message': 'Court name already exists'}), 400
             court.name = data['name']
 
+        type_changed = 'type' in data and data['type'] != court.type
         if 'type' in data:
             court.type = data['type']
 
@@ -353,6 +519,10 @@ def manage_court(court_id):
             court.is_active = data['isActive']
 
         db.session.commit()
+        catalog_cache.bump()
+        if type_changed:
+            # Revenue by court type groups on each court's current type
+            reports.revenue_report_cache.clear()
         return jsonify({'success': True, 'message': 'Court updated successfully'})
 
     elif request.method == 'DELETE':
@@ -362,6 +532,7 @@ def manage_court(court_id):
 
         db.session.delete(court)
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Court deleted successfully'})
 
 
@@ -372,13 +543,15 @@ def manage_equipment():
     """Get all equipment or add new equipment"""
     if request.method == 'GET':
         equipment = Equipment.query.order_by(Equipment.name).all()
+        booked = get_booked_equipment_quantities()
         return jsonify([{
             'id': eq.id,
             'name': eq.name,
             'price': eq.price,
             'totalAvailable': eq.total_available,
             'createdAt': eq.created_at.strftime('%Y-%m-%d'),
-            'currentlyBooked': get_currently_booked_quantity(eq.id)
+            'currentlyBooked': booked.get(eq.id, (0, 0))[0],
+            'peakBooked': booked.get(eq.id, (0, 0))[1]
         } for eq in equipment])
 
     elif request.method == 'POST':
@@ -398,6 +571,7 @@ def manage_equipment():
 
         db.session.add(equipment)
         db.session.commit()
+        catalog_cache.bump()
 
         return jsonify({'success': True, 'message': 'Equipment added successfully'})
 
@@ -424,6 +598,7 @@ def manage_equipment_item(equipment_id):
             equipment.total_available = data['totalAvailable']
 
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Equipment updated successfully'})
 
     elif request.method == 'DELETE':
@@ -433,6 +608,7 @@ def manage_equipment_item(equipment_id):
 
         db.session.delete(equipment)
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Equipment deleted successfully'})
 
 
@@ -442,17 +618,16 @@ def manage_equipment_item(equipment_id):
 def manage_coaches():
     """Get all coaches or add new coach"""
     if request.method == 'GET':
-        coaches = Coach.query.order_by(Coach.name).all()
+        # Get booking counts for each coach from one grouped subquery
+        counts = booking_counts(Booking.coach_id)
+        coaches = db.session.query(
+            Coach,
+            db.func.coalesce(counts.c.total, 0),
+            db.func.coalesce(counts.c.upcoming, 0)
+        ).outerjoin(counts, counts.c.key == Coach.id).order_by(Coach.name).all()
 
-        # Get booking counts for each coach
         coaches_data = []
-        for coach in coaches:
-            total_bookings = Booking.query.filter_by(coach_id=coach.id).count()
-            upcoming_bookings = Booking.query.filter(
-                Booking.coach_id == coach.id,
-                Booking.date >= date.today()
-            ).count()
-
+        for coach, total_bookings, upcoming_bookings in coaches:
             coaches_data.append({
                 'id': coach.id,
                 'name': coach.name,
@@ -482,6 +657,7 @@ def manage_coaches():
 
         db.session.add(coach)
         db.session.commit()
+        catalog_cache.bump()
 
         return jsonify({'success': True, 'message': 'Coach added successfully'})
 
@@ -508,6 +684,7 @@ def manage_coach(coach_id):
             coach.specialization = data['specialization']
 
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Coach updated successfully'})
 
     elif request.method == 'DELETE':
@@ -517,6 +694,7 @@ def manage_coach(coach_id):
 
         db.session.delete(coach)
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Coach deleted successfully'})
 
 
@@ -549,6 +727,19 @@ def manage_pricing_rules():
         for rule_data in data['rules']:
             rule = PricingRule.query.filter_by(rule_type=rule_data['ruleType']).first()
 
+            if rule_data.get('applyDays'):
+                try:
+                    if not isinstance(rule_data['applyDays'], str):
+                        raise ValueError
+                    days = parse_apply_days(rule_data['applyDays'])
+                except ValueError:
+                    db.session.rollback()
+                    return jsonify({
+                        'success': False,
+                        'message': 'applyDays must be comma-separated weekdays from 1 (Monday) to 7 (Sunday)'
+                    }), 400
+                rule_data['applyDays'] = ','.join(str(day) for day in sorted(days))
+
             if rule:
                 rule.enabled = rule_data.get('enabled', rule.enabled)
                 rule.multiplier = rule_data.get('multiplier', rule.multiplier)
@@ -559,83 +750,55 @@ def manage_pricing_rules():
                 rule.apply_days = rule_data.get('applyDays', rule.apply_days)
 
         db.session.commit()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Pricing rules updated successfully'})
 
 
 @admin_bp.route('/api/reports/revenue')
 @login_required
 @admin_required
+@query_budget(6)
 def get_revenue_report():
     """Get revenue reports"""
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
 
-    query = Booking.query
-
-    if start_date:
-        query = query.filter(Booking.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Booking.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-    # Get total revenue
-    total_revenue = db.session.query(db.func.sum(Booking.total_price)).scalar() or 0
-
-    # Get revenue by court type
-    revenue_by_court = db.session.query(
-        Court.type,
-        db.func.sum(Booking.total_price)
-    ).join(Court).group_by(Court.type).all()
-
-    # Get revenue by month
-    revenue_by_month = db.session.query(
-        db.func.strftime('%Y-%m', Booking.date),
-        db.func.count(Booking.id),
-        db.func.sum(Booking.total_price)
-    ).group_by(db.func.strftime('%Y-%m', Booking.date)).order_by(
-        db.func.strftime('%Y-%m', Booking.date).desc()
-    ).limit(12).all()
-
-    # Get top users by spending
-    top_users = db.session.query(
-        User.username,
-        db.func.count(Booking.id).label('booking_count'),
-        db.func.sum(Booking.total_price).label('total_spent')
-    ).join(Booking).group_by(User.id).order_by(
-        db.func.sum(Booking.total_price).desc()
-    ).limit(10).all()
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Dates must be YYYY-MM-DD'}), 400
 
-    return jsonify({
-        'totalRevenue': total_revenue,
-        'totalBookings': query.count(),
-        'revenueByCourt': [
-            {'type': court_type, 'revenue': revenue}
-            for court_type, revenue in revenue_by_court
-        ],
-        'revenueByMonth': [
-            {'month': month, 'bookings': count, 'revenue': revenue}
-            for month, count, revenue in revenue_by_month
-        ],
-        'topUsers': [
-            {'username': username, 'bookings': count, 'totalSpent': spent}
-            for username, count, spent in top_users
-        ]
-    })
+    return jsonify(reports.get_revenue_report(start_date, end_date))
 
 
-def get_currently_booked_quantity(equipment_id):
-    """Helper function to get currently booked equipment quantity"""
-    today = date.today()
-    booked_bookings = Booking.query.filter(
-        Booking.date >= today
-    ).all()
-
-    total_booked = 0
-    for booking in booked_bookings:
-        booking_eq = BookingEquipment.query.filter_by(
-            booking_id=booking.id,
-            equipment_id=equipment_id
-        ).first()
-        if booking_eq:
-            total_booked += booking_eq.quantity
-
-    return total_booked
\ No newline at end of file
+def get_booked_equipment_quantities():
+    """Booked quantity per equipment over future bookings: {equipment_id: (total, peak in any single slot)}"""
+    per_slot = db.session.query(
+        BookingEquipment.equipment_id.label('equipment_id'),
+        db.func.sum(BookingEquipment.quantity).label('quantity')
+    ).join(Booking, Booking.id == BookingEquipment.booking_id).filter(
+        Booking.date >= date.today()
+    ).group_by(
+        BookingEquipment.equipment_id, Booking.date, Booking.time_slot
+    ).subquery()
+
+    rows = db.session.query(
+        per_slot.c.equipment_id,
+        db.func.sum(per_slot.c.quantity),
+        db.func.max(per_slot.c.quantity)
+    ).group_by(per_slot.c.equipment_id).all()
+
+    return {equipment_id: (total, peak) for equipment_id, total, peak in rows}
+
+
+@admin_bp.route('/api/sql-stats', methods=['GET', 'DELETE'])
+@login_required
+@admin_required
+def sql_stats():
+    """Per-endpoint SQL statistics of recent requests (needs COURTBOOK_SQL_INSTRUMENTATION=1)"""
+    if request.method == 'DELETE':
+        request_log.clear()
+        return jsonify({'success': True, 'message': 'SQL statistics cleared'})
+
+    return jsonify(dict(request_log.summary(), enabled=bool(current_app.config.get('SQL_INSTRUMENTATION'))))
@@ -1,22 +1,40 @@
 # app.py - UPDATED
-from flask import Flask, render_template, redirect, url_for, flash, jsonify, request
+from flask import Flask, Response, render_template, send_file, redirect, url_for, flash, jsonify, request
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User, Court, Equipment, Coach, Booking, BookingEquipment, PricingRule
-from database import init_db, seed_data
+from models import db, User, Court, Equipment, Coach, Booking, BookingEquipment
+from database import configure_database, init_db, seed_data
+from instrumentation import init_instrumentation
+from metrics import metrics, init_metrics, record_booking_outcome
+from rollups import rebuild_rollups
+from migrations import run_migrations, explain_hot_queries
+import os
 import json
-from datetime import datetime, date
-from decorators import admin_required  # Import from decorators
+import secrets
+import hashlib
+from datetime import datetime, date, timedelta
+from decorators import admin_required, query_budget  # Import from decorators
 from admin import admin_bp
+from pricing import get_pricing_engine
+from catalog import catalog_cache, get_court_list, get_equipment_list, get_coach_list
+from pagination import encode_cursor, decode_cursor
+from bookings import (MAX_OCCURRENCES, BookingError, get_booking_slots, reserve_booking, reserve_recurring,
+                      create_hold, release_hold)
+from availability import (TIME_SLOTS, SLOT_BITS, ALL_SLOTS_MASK, MAX_RANGE_DAYS, DayIndex,
+                          availability_index, get_held_days, get_occupancy)
+from events import stream_events
+from holds import HOLD_SECONDS
+from backup import BackupError, backup_manager, get_backup, list_backups
 
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///courtbook.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Initialize database and login manager
-db.init_app(app)
+configure_database(app)
+init_instrumentation(app)
+init_metrics(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -98,204 +116,313 @@ def logout():
 # The blueprint handles the /admin route
 
 
+def catalog_response(payload):
+    """JSON response with a strong ETag that answers a matching If-None-Match with 304"""
+    response = jsonify(payload)
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+    # Cached by the browser but revalidated on every use, since admins can edit the catalog
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
 # API Routes
+@app.route('/api/bootstrap')
+@login_required
+@query_budget(5)
+def get_bootstrap():
+    """Everything the booking page needs before it becomes usable, in one response"""
+    return catalog_response({
+        'courts': get_court_list(),
+        'equipment': get_equipment_list(),
+        'coaches': get_coach_list(),
+        'time_slots': TIME_SLOTS,
+        'pricing_rules': get_pricing_engine().to_client()
+    })
+
+
 @app.route('/api/courts')
 @login_required
 def get_courts():
-    courts = Court.query.all()
-    return jsonify([{
-        'id': court.id,
-        'name': court.name,
-        'type': court.type,
-        'base_price': court.base_price
-    } for court in courts])
+    return catalog_response(get_court_list())
 
 
 @app.route('/api/equipment')
 @login_required
 def get_equipment():
-    equipment = Equipment.query.all()
-    return jsonify([{
-        'id': eq.id,
-        'name': eq.name,
-        'price': eq.price,
-        'available': eq.total_available
-    } for eq in equipment])
+    return catalog_response(get_equipment_list())
 
 
 @app.route('/api/coaches')
 @login_required
 def get_coaches():
-    coaches = Coach.query.all()
-    return jsonify([{
-        'id': coach.id,
-        'name': coach.name,
-        'price': coach.price,
-        'specialization': coach.specialization
-    } for coach in coaches])
+    return catalog_response(get_coach_list())
 
 
 @app.route('/api/timeslots')
 @login_required
 def get_timeslots():
-    time_slots = [
-        '06:00', '07:00', '08:00', '09:00', '10:00', '11:00',
-        '12:00', '13:00', '14:00', '15:00', '16:00', '17:00',
-        '18:00', '19:00', '20:00', '21:00'
-    ]
-    return jsonify(time_slots)
+    return catalog_response(TIME_SLOTS)
 
 
 @app.route('/api/pricing_rules')
 @login_required
 def get_pricing_rules():
-    # Get all enabled pricing rules
-    rules = PricingRule.query.filter_by(enabled=True).all()
-    # Convert to frontend format
-    rules_dict = {}
-    for rule in rules:
-        if rule.rule_type == 'peak_hours':
-            rules_dict['peakHours'] = {
-                'enabled': rule.enabled,
-                'multiplier': rule.multiplier,
-                'start': rule.start_time or '18:00',
-                'end': rule.end_time or '21:00'
-            }
-        elif rule.rule_type == 'weekend':
-            rules_dict['weekend'] = {
-                'enabled': rule.enabled,
-                'multiplier': rule.multiplier
-            }
-        elif rule.rule_type == 'indoor':
-            rules_dict['indoor'] = {
-                'enabled': rule.enabled,
-                'multiplier': rule.multiplier
-            }
-        elif rule.rule_type == 'multiple_hours':
-            rules_dict['multipleHours'] = {
-                'enabled': rule.enabled,
-                'discountPerHour': rule.discount
-            }
-        elif rule.rule_type == 'bundle':
-            rules_dict['bundle'] = {
-                'enabled': rule.enabled,
-                'discount': rule.discount,
-                'minItems': rule.min_items or 3
-            }
-
-    return jsonify(rules_dict)
+    # Enabled pricing rules in frontend format, from the compiled engine
+    return catalog_response(get_pricing_engine().to_client())
 
 
 @app.route('/api/bookings', methods=['GET', 'POST'])
 @login_required
+@query_budget(16)
 def handle_bookings():
     if request.method == 'GET':
-        # Get user's booking history
-        bookings = Booking.query.filter_by(user_id=current_user.id).order_by(Booking.date.desc()).all()
+        # Get user's booking history, newest first; related rows are loaded up front
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        if limit is not None:
+            if limit < 1:
+                return jsonify({'success': False, 'message': 'limit must be at least 1'}), 400
+            limit = min(limit, 500)
+
+        query = Booking.query.options(
+            db.joinedload(Booking.court),
+            db.joinedload(Booking.coach),
+            db.selectinload(Booking.equipment).joinedload(BookingEquipment.equipment_item)
+        ).filter_by(user_id=current_user.id)
+
+        # Keyset pagination on (date, id)
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_cursor(cursor)
+                cursor_date = datetime.strptime(cursor_date, '%Y-%m-%d').date()
+                cursor_id = int(cursor_id)
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            query = query.filter(
+                (Booking.date < cursor_date) |
+                ((Booking.date == cursor_date) & (Booking.id < cursor_id))
+            )
+
+        query = query.order_by(Booking.date.desc(), Booking.id.desc())
+        if limit:
+            # Fetch one extra row to know whether another page exists
+            bookings = query.limit(limit + 1).all()
+            has_more = len(bookings) > limit
+            bookings = bookings[:limit]
+        else:
+            bookings = query.all()
 
         booking_list = []
         for booking in bookings:
-            # Get equipment for this booking
-            booking_equipment = BookingEquipment.query.filter_by(booking_id=booking.id).all()
-            equipment_details = []
-            for be in booking_equipment:
-                eq = Equipment.query.get(be.equipment_id)
-                equipment_details.append({
-                    'name': eq.name,
-                    'quantity': be.quantity,
-                    'price': eq.price
-                })
-
-            # Get coach details
-            coach_details = None
-            if booking.coach_id:
-                coach = Coach.query.get(booking.coach_id)
-                coach_details = {
-                    'name': coach.name,
-                    'price': coach.price
-                }
-
             booking_list.append({
                 'id': booking.id,
                 'date': booking.date.strftime('%Y-%m-%d'),
                 'time_slot': booking.time_slot,
+                'court_id': booking.court_id,
                 'court': {
                     'name': booking.court.name,
                     'type': booking.court.type,
                     'base_price': booking.court.base_price
                 },
-                'equipment': equipment_details,
-                'coach': coach_details,
+                'equipment': [{
+                    'name': be.equipment_item.name,
+                    'quantity': be.quantity,
+                    'price': be.equipment_item.price
+                } for be in booking.equipment],
+                'coach': {
+                    'name': booking.coach.name,
+                    'price': booking.coach.price
+                } if booking.coach else None,
                 'total_price': booking.total_price
             })
 
-        return jsonify(booking_list)
+        if not limit:
+            return jsonify(booking_list)
+
+        next_cursor = None
+        if has_more:
+            last = bookings[-1]
+            next_cursor = encode_cursor([last.date.strftime('%Y-%m-%d'), last.id])
+
+        return jsonify({'bookings': booking_list, 'next_cursor': next_cursor})
 
     elif request.method == 'POST':
-        # Create new booking
-        data = request.get_json()
+        # Create new booking, replacing the player's hold if they have one
+        data = request.get_json(silent=True) or {}
+
+        # Price server-side and reserve every slot, the coach and the equipment in one transaction
+        try:
+            court, coach, equipment, booking_date, time_slots = get_booking_selection(data)
+            total_price = get_pricing_engine().price(
+                court, booking_date, time_slots[0], len(time_slots), equipment, coach
+            )
+            bookings = reserve_booking(
+                current_user.id,
+                court,
+                booking_date,
+                time_slots,
+                coach=coach,
+                equipment=equipment,
+                total_price=total_price,
+                hold_token=data.get('holdToken')
+            )
+        except BookingError as e:
+            record_booking_outcome(e.reason)
+            return jsonify({'success': False, 'message': str(e)})
+
+        record_booking_outcome('confirmed')
+        return jsonify({
+            'success': True,
+            'message': 'Booking confirmed!',
+            'booking_id': bookings[0].id,
+            'booking_ids': [booking.id for booking in bookings],
+            'total_price': total_price
+        })
+
+
+def get_booking_selection(data, with_slots=True):
+    """Court, coach, equipment, date and slots of a booking or hold request; raises BookingError.
+
+    with_slots=False returns only the court, coach and equipment.
+    """
+    try:
+        court_id = int(data['court']['id'])
+        coach_id = int(data['coach']['id']) if data.get('coach') else None
+        requested = {int(equip_id): int(quantity) for equip_id, quantity in (data.get('equipment') or {}).items()}
+        booking_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if with_slots else None
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise BookingError('Give a court id, a date as YYYY-MM-DD and whole-number equipment quantities')
+
+    court = Court.query.get(court_id)
+    if not court:
+        raise BookingError('Court not found')
+
+    coach = None
+    if coach_id is not None:
+        coach = Coach.query.get(coach_id)
+
+    requested = {equip_id: quantity for equip_id, quantity in requested.items() if quantity > 0}
+    equipment = {}
+    if requested:
+        for item in Equipment.query.filter(Equipment.id.in_(requested)).all():
+            equipment[item] = requested[item.id]
+
+    if not with_slots:
+        return court, coach, equipment
 
-        # Validate booking data
-        court = Court.query.get(data['court']['id'])
-        if not court:
-            return jsonify({'success': False, 'message': 'Court not found'})
-
-        # Check if court is available for this timeslot
-        existing_booking = Booking.query.filter_by(
-            court_id=court.id,
-            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-            time_slot=data['timeSlot']
-        ).first()
-
-        if existing_booking:
-            return jsonify({'success': False, 'message': 'Court already booked for this timeslot'})
-
-        # Check coach availability
-        coach = None
-        if data.get('coach'):
-            coach = Coach.query.get(data['coach']['id'])
-            if coach:
-                # Check if coach is already booked
-                coach_booking = Booking.query.filter_by(
-                    coach_id=coach.id,
-                    date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                    time_slot=data['timeSlot']
-                ).first()
-
-                if coach_booking:
-                    return jsonify({'success': False, 'message': 'Coach already booked for this timeslot'})
-
-        # Create booking
-        booking = Booking(
-            user_id=current_user.id,
-            court_id=court.id,
-            coach_id=coach.id if coach else None,
-            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-            time_slot=data['timeSlot'],
-            total_price=data['totalPrice']
+    return court, coach, equipment, booking_date, get_booking_slots(data)
+
+
+def get_occurrences(data):
+    """(date, time_slots) occurrences of a recurring request; raises BookingError.
+
+    Either startDate + weeks with timeSlots/timeSlot for a weekly booking, or
+    an explicit occurrences list of {date, timeSlots/timeSlot}.
+    """
+    too_many = BookingError(f'Book between 1 and {MAX_OCCURRENCES} occurrences at once')
+    try:
+        if data.get('occurrences'):
+            if len(data['occurrences']) > MAX_OCCURRENCES:
+                raise too_many
+            occurrences = [
+                (datetime.strptime(occurrence['date'], '%Y-%m-%d').date(), get_booking_slots(occurrence))
+                for occurrence in data['occurrences']
+            ]
+        else:
+            start = datetime.strptime(data['startDate'], '%Y-%m-%d').date()
+            time_slots = get_booking_slots(data)
+            weeks = int(data['weeks'])
+            # Checked before the dates are built: a huge count would run past date.max or exhaust memory
+            if not 1 <= weeks <= MAX_OCCURRENCES:
+                raise too_many
+            occurrences = [(start + timedelta(weeks=week), time_slots) for week in range(weeks)]
+    except (KeyError, TypeError, ValueError, OverflowError):
+        raise BookingError('Give startDate and weeks, or a list of occurrences with dates as YYYY-MM-DD')
+
+    if not occurrences:
+        raise too_many
+    return occurrences
+
+
+@app.route('/api/bookings/recurring', methods=['POST'])
+@login_required
+def book_recurring():
+    """Book the same court/coach/equipment weekly or on a list of dates, in one transaction"""
+    data = request.get_json(silent=True) or {}
+    all_or_nothing = bool(data.get('allOrNothing'))
+
+    try:
+        court, coach, equipment = get_booking_selection(data, with_slots=False)
+        occurrences = get_occurrences(data)
+        engine = get_pricing_engine()
+        prices = [
+            engine.price(court, day, time_slots[0], len(time_slots), equipment, coach)
+            for day, time_slots in occurrences
+        ]
+        booked, conflicts = reserve_recurring(
+            current_user.id, court, occurrences, prices,
+            coach=coach, equipment=equipment, all_or_nothing=all_or_nothing
         )
+    except BookingError as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+    conflict_list = [{
+        'date': occurrences[i][0].strftime('%Y-%m-%d'),
+        'time_slots': occurrences[i][1],
+        'reason': reason
+    } for i, reason in sorted(conflicts.items())]
+
+    if not booked:
+        return jsonify({
+            'success': False,
+            'message': 'Nothing was booked' if all_or_nothing else 'None of the occurrences are available',
+            'conflicts': conflict_list
+        })
 
-        db.session.add(booking)
-        db.session.commit()
+    return jsonify({
+        'success': True,
+        'message': f'{len(booked)} of {len(occurrences)} occurrences booked',
+        'bookings': [{
+            'date': occurrences[i][0].strftime('%Y-%m-%d'),
+            'time_slots': occurrences[i][1],
+            'booking_ids': [booking.id for booking in slots],
+            'total_price': prices[i]
+        } for i, slots in booked],
+        'conflicts': conflict_list,
+        'total_price': sum(prices[i] for i, _ in booked)
+    })
 
-        # Add equipment to booking
-        for equip_id, quantity in data['equipment'].items():
-            equipment = Equipment.query.get(int(equip_id))
-            if equipment and quantity > 0:
-                booking_eq = BookingEquipment(
-                    booking_id=booking.id,
-                    equipment_id=equipment.id,
-                    quantity=quantity
-                )
-                db.session.add(booking_eq)
 
-        db.session.commit()
+@app.route('/api/holds', methods=['POST'])
+@login_required
+def place_hold():
+    """Hold a court/slots selection with its coach and equipment while the player finishes booking"""
+    try:
+        court, coach, equipment, booking_date, time_slots = get_booking_selection(request.get_json(silent=True) or {})
+        hold = create_hold(current_user.id, court, booking_date, time_slots, coach=coach, equipment=equipment)
+    except BookingError as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+    return jsonify({
+        'success': True,
+        'hold_token': hold.token,
+        'time_slots': hold.time_slots,
+        'expires_at': hold.expires_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'expires_in': HOLD_SECONDS
+    })
+
 
-        return jsonify({'success': True, 'message': 'Booking confirmed!', 'booking_id': booking.id})
+@app.route('/api/holds/<token>', methods=['DELETE'])
+@login_required
+def delete_hold(token):
+    if not release_hold(current_user.id, token):
+        return jsonify({'success': False, 'message': 'Hold not found'}), 404
+    return jsonify({'success': True, 'message': 'Hold released'})
 
 
 @app.route('/api/check_availability')
 @login_required
+@query_budget(5)
 def check_availability():
     selected_date = request.args.get('date')
     selected_time = request.args.get('time')
@@ -303,55 +430,153 @@ def check_availability():
     if not selected_date:
         return jsonify({})
 
-    # Get booked courts for this date and time
-    booked_courts = Booking.query.filter_by(
-        date=datetime.strptime(selected_date, '%Y-%m-%d').date()
-    )
+    try:
+        booking_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Dates must be YYYY-MM-DD'}), 400
+
+    day_index = availability_index.get_day(booking_date)
+    held = get_held_days(booking_date, booking_date, current_user.id).get(booking_date) or DayIndex()
+
+    # Bit tests against the date's slot bitmaps; without a time any booking counts.
+    # Slots other players hold count as booked.
+    slot_mask = SLOT_BITS.get(selected_time, 0) if selected_time else ALL_SLOTS_MASK
+    booked_court_ids = sorted({court_id for index in (day_index, held)
+                               for court_id, bits in index.courts.items() if bits & slot_mask})
+    booked_coach_ids = sorted({coach_id for index in (day_index, held)
+                               for coach_id, bits in index.coaches.items() if bits & slot_mask})
+    booked_quantities = day_index.equipment.get(selected_time, {})
+    held_quantities = held.equipment.get(selected_time, {})
+
+    # Get equipment availability (booked quantities only count for a specific slot)
+    equipment_availability = {}
+    for equipment_id, total_available in db.session.query(Equipment.id, Equipment.total_available):
+        booked = booked_quantities.get(equipment_id, 0) + held_quantities.get(equipment_id, 0) if selected_time else 0
+        equipment_availability[equipment_id] = max(0, total_available - booked)
+
+    return jsonify({
+        'booked_courts': booked_court_ids,
+        'booked_coaches': booked_coach_ids,
+        'equipment_availability': equipment_availability
+    })
 
-    if selected_time:
-        booked_courts = booked_courts.filter_by(time_slot=selected_time)
 
-    booked_courts = booked_courts.all()
+@app.route('/api/availability')
+@login_required
+@query_budget(5)
+def get_availability():
+    """Whole-day occupancy for a date or a date range"""
+    start_date = request.args.get('start_date') or request.args.get('date')
+    end_date = request.args.get('end_date') or start_date
 
-    booked_court_ids = [b.court_id for b in booked_courts]
-    booked_coach_ids = [b.coach_id for b in booked_courts if b.coach_id]
+    if not start_date:
+        return jsonify({'success': False, 'message': 'Date is required'}), 400
 
-    # Get equipment availability
-    equipment = Equipment.query.all()
-    equipment_availability = {}
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Dates must be YYYY-MM-DD'}), 400
+
+    if end < start:
+        return jsonify({'success': False, 'message': 'end_date is before start_date'}), 400
+
+    if (end - start).days >= MAX_RANGE_DAYS:
+        return jsonify({'success': False, 'message': f'Range is limited to {MAX_RANGE_DAYS} days'}), 400
 
-    for eq in equipment:
-        # Start with total available
-        available = eq.total_available
+    return jsonify({
+        'time_slots': TIME_SLOTS,
+        'dates': get_occupancy(start, end, exclude_holds_of=current_user.id)
+    })
 
-        if selected_time:
-            # Get total booked quantity for this equipment at this specific time
-            total_booked = 0
-            bookings_with_slot = Booking.query.filter_by(
-                date=datetime.strptime(selected_date, '%Y-%m-%d').date(),
-                time_slot=selected_time
-            ).all()
 
-            for booking in bookings_with_slot:
-                booking_eq = BookingEquipment.query.filter_by(
-                    booking_id=booking.id,
-                    equipment_id=eq.id
-                ).first()
+@app.route('/api/availability/stream')
+@login_required
+def stream_availability():
+    """Server-Sent Events of slots taken and freed on one date"""
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Date must be YYYY-MM-DD'}), 400
 
-                if booking_eq:
-                    total_booked += booking_eq.quantity
+    return Response(stream_events(day), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
-            available = eq.total_available - total_booked
 
-        equipment_availability[eq.id] = max(0, available)
+@app.route('/api/quotes')
+@login_required
+@query_budget(3)
+def get_quotes():
+    """Price of every court and start slot over a date range"""
+    start_date = request.args.get('start_date') or request.args.get('date')
+    end_date = request.args.get('end_date') or start_date
+    duration = request.args.get('duration', 1, type=int)
+
+    if not start_date:
+        return jsonify({'success': False, 'message': 'Date is required'}), 400
+
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        # Equipment as "id:quantity,id:quantity"
+        requested = {}
+        for part in filter(None, request.args.get('equipment', '').split(',')):
+            equip_id, quantity = part.split(':')
+            requested[int(equip_id)] = int(quantity)
+        coach_id = int(request.args['coach']) if request.args.get('coach') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid dates, coach or equipment'}), 400
+
+    if end < start or (end - start).days >= MAX_RANGE_DAYS:
+        return jsonify({'success': False, 'message': f'Range must be 1 to {MAX_RANGE_DAYS} days'}), 400
+
+    if not 1 <= duration <= len(TIME_SLOTS):
+        return jsonify({'success': False, 'message': 'Invalid duration'}), 400
+
+    coach = None
+    if coach_id is not None:
+        coach = Coach.query.get(coach_id)
+        if coach is None:
+            return jsonify({'success': False, 'message': 'Coach not found'}), 400
+
+    equipment = {}
+    if requested:
+        for item in Equipment.query.filter(Equipment.id.in_(requested)).all():
+            equipment[item] = requested[item.id]
+
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    matrix = get_pricing_engine().quote_matrix(
+        Court.query.all(), dates, TIME_SLOTS, duration, equipment, coach
+    )
+
+    quotes = {}
+    cheapest = None
+    for day, courts in matrix.items():
+        day_key = day.strftime('%Y-%m-%d')
+        quotes[day_key] = courts
+        for court_id, slots in courts.items():
+            for slot, price in slots.items():
+                if cheapest is None or price < cheapest['price']:
+                    cheapest = {'date': day_key, 'court_id': court_id, 'time_slot': slot, 'price': price}
 
     return jsonify({
-        'booked_courts': booked_court_ids,
-        'booked_coaches': booked_coach_ids,
-        'equipment_availability': equipment_availability
+        'duration': duration,
+        'dates': quotes,
+        'cheapest': cheapest
     })
 
 
+@app.route('/metrics')
+def get_metrics():
+    """Request, SQL and booking metrics of every worker, for Prometheus to scrape"""
+    token = os.environ.get('COURTBOOK_METRICS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/admin/seed', methods=['POST'])
 @login_required
 @admin_required
@@ -359,24 +584,79 @@ def seed_admin_data():
     """Seed additional data (admin only)"""
     try:
         seed_data()
+        catalog_cache.bump()
         return jsonify({'success': True, 'message': 'Database seeded successfully'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
-@app.route('/api/admin/backup', methods=['GET'])
+def backup_directory():
+    return os.environ.get('COURTBOOK_BACKUP_DIR') or os.path.join(app.instance_path, 'backups')
+
+
+@app.route('/api/admin/backup', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def backup_database():
-    """Create database backup (admin only)"""
+    """Start an online backup of the live database (POST), or list recent backups (GET) (admin only)"""
+    if request.method == 'GET':
+        return jsonify({'success': True, 'backups': list_backups(backup_directory())})
+
+    data = request.get_json(silent=True) or {}
     try:
-        backup_path = f'backup_courtbook_{datetime.now().strftime("%Y%m%d_%H%M%S")}.db'
-        # This is a simple backup - in production, use proper backup methods
-        import shutil
-        shutil.copy2('courtbook.db', backup_path)
-        return jsonify({'success': True, 'message': f'Backup created: {backup_path}'})
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+        job = backup_manager.start(db.engine.url.database, backup_directory(), compress=bool(data.get('compress')))
+    except BackupError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    return jsonify({'success': True, 'message': 'Backup started', 'backup': job.to_dict()}), 202
+
+
+@app.route('/api/admin/backup/<backup_id>')
+@login_required
+@admin_required
+def backup_status(backup_id):
+    """Progress of a backup: state, pages copied of pages total, and size once done"""
+    try:
+        return jsonify({'success': True, 'backup': get_backup(backup_directory(), backup_id)})
+    except BackupError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+
+
+@app.route('/api/admin/backup/<backup_id>/download')
+@login_required
+@admin_required
+def download_backup(backup_id):
+    try:
+        backup = get_backup(backup_directory(), backup_id)
+    except BackupError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    if backup['state'] != 'done':
+        return jsonify({'success': False, 'message': f'Backup is {backup["state"]}'}), 409
+
+    # Streamed from disk in blocks
+    return send_file(os.path.join(backup_directory(), backup['filename']), as_attachment=True,
+                     download_name=backup['filename'], mimetype='application/octet-stream')
+
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the dashboard's daily rollups from the bookings table"""
+    rebuild_rollups()
+    print('Booking rollups rebuilt.')
+
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Upgrade an existing database file to the current schema"""
+    db.create_all()
+    if not run_migrations():
+        print('Database schema is up to date.')
+
+
+@app.cli.command('explain-hot-queries')
+def explain_hot_queries_command():
+    """Show the query plan of the hot booking queries and whether they use their indexes"""
+    for name, index, plan, uses_index in explain_hot_queries():
+        print(f'{"OK  " if uses_index else "MISS"} {name} ({index}): {plan}')
 
 
 if __name__ == '__main__':
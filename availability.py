@@ -0,0 +1,235 @@
+# availability.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from models import db, Booking, BookingEquipment, Equipment
+from holds import get_active_holds
+
+TIME_SLOTS = [
+    '06:00', '07:00', '08:00', '09:00', '10:00', '11:00',
+    '12:00', '13:00', '14:00', '15:00', '16:00', '17:00',
+    '18:00', '19:00', '20:00', '21:00'
+]
+SLOT_BITS = {slot: 1 << i for i, slot in enumerate(TIME_SLOTS)}
+ALL_SLOTS_MASK = (1 << len(TIME_SLOTS)) - 1
+
+# Longest window a single occupancy request may cover
+MAX_RANGE_DAYS = 31
+
+# Dates kept in the in-process index, and how long a warmed date is trusted.
+# The expiry picks up bookings written by other worker processes.
+MAX_INDEXED_DATES = 90
+INDEX_TTL_SECONDS = 30
+
+
+class DayIndex:
+    """Booked slots of one date as bitmaps, plus booked equipment per slot"""
+
+    def __init__(self):
+        self.booking_ids = set()
+        self.courts = {}
+        self.coaches = {}
+        self.equipment = {slot: {} for slot in TIME_SLOTS}
+        self.loaded_at = time.monotonic()
+
+    def add(self, booking_id, court_id, coach_id, time_slot, equipment_lines):
+        # A write-through can race with a reload that already saw the booking
+        bit = SLOT_BITS.get(time_slot)
+        if bit is None or booking_id in self.booking_ids:
+            return
+        self.booking_ids.add(booking_id)
+        self.courts[court_id] = self.courts.get(court_id, 0) | bit
+        if coach_id:
+            self.coaches[coach_id] = self.coaches.get(coach_id, 0) | bit
+        self.add_equipment(time_slot, equipment_lines)
+
+    def add_equipment(self, time_slot, equipment_lines, sign=1):
+        booked = self.equipment.get(time_slot)
+        if booked is None:
+            return
+        for equipment_id, quantity in equipment_lines:
+            booked[equipment_id] = max(0, booked.get(equipment_id, 0) + sign * quantity)
+
+    def remove(self, booking_id, court_id, coach_id, time_slot, equipment_lines):
+        bit = SLOT_BITS.get(time_slot)
+        if bit is None or booking_id not in self.booking_ids:
+            return
+        self.booking_ids.discard(booking_id)
+        self.courts[court_id] = self.courts.get(court_id, 0) & ~bit
+        if coach_id:
+            self.coaches[coach_id] = self.coaches.get(coach_id, 0) & ~bit
+        self.add_equipment(time_slot, equipment_lines, sign=-1)
+
+
+class AvailabilityIndex:
+    """In-process availability index keyed by date, with a bounded LRU over dates.
+
+    Dates are warmed lazily from the database and kept current by the booking
+    create/delete paths through add_booking/remove_booking/invalidate.
+    """
+
+    def __init__(self, max_dates=MAX_INDEXED_DATES, ttl=INDEX_TTL_SECONDS):
+        self.max_dates = max_dates
+        self.ttl = ttl
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, day_index):
+        return time.monotonic() - day_index.loaded_at < self.ttl
+
+    def _warm(self, dates):
+        """Load the given dates with one scan over their date span"""
+        loaded = {day: DayIndex() for day in dates}
+
+        rows = db.session.query(
+            Booking.id,
+            Booking.date,
+            Booking.time_slot,
+            Booking.court_id,
+            Booking.coach_id,
+            BookingEquipment.equipment_id,
+            BookingEquipment.quantity
+        ).outerjoin(
+            BookingEquipment, BookingEquipment.booking_id == Booking.id
+        ).filter(
+            Booking.date >= min(dates),
+            Booking.date <= max(dates)
+        ).all()
+
+        for booking_id, booking_date, time_slot, court_id, coach_id, equipment_id, quantity in rows:
+            day_index = loaded.get(booking_date)
+            if day_index is None:
+                continue
+
+            # A booking with several equipment lines comes back once per line
+            day_index.add(booking_id, court_id, coach_id, time_slot, [])
+            if equipment_id and booking_id in day_index.booking_ids:
+                day_index.add_equipment(time_slot, [(equipment_id, quantity)])
+
+        return loaded
+
+    def get_days(self, dates):
+        """Return {date: DayIndex}, warming every missing or stale date together"""
+        with self._lock:
+            result = {}
+            missing = []
+            for day in dates:
+                day_index = self._days.get(day)
+                if day_index is not None and self._is_fresh(day_index):
+                    self._days.move_to_end(day)
+                    result[day] = day_index
+                else:
+                    missing.append(day)
+
+            if missing:
+                for day, day_index in self._warm(missing).items():
+                    self._days[day] = day_index
+                    self._days.move_to_end(day)
+                    result[day] = day_index
+
+                while len(self._days) > self.max_dates:
+                    self._days.popitem(last=False)
+
+            return result
+
+    def get_day(self, day):
+        return self.get_days([day])[day]
+
+    def is_court_free(self, day, court_id, time_slot):
+        return not self.get_day(day).courts.get(court_id, 0) & SLOT_BITS.get(time_slot, 0)
+
+    def is_coach_free(self, day, coach_id, time_slot):
+        return not self.get_day(day).coaches.get(coach_id, 0) & SLOT_BITS.get(time_slot, 0)
+
+    def add_booking(self, booking, equipment_lines):
+        """Write-through for a committed booking; equipment_lines is [(equipment_id, quantity)]"""
+        with self._lock:
+            day_index = self._days.get(booking.date)
+            if day_index is not None:
+                day_index.add(booking.id, booking.court_id, booking.coach_id, booking.time_slot, equipment_lines)
+
+    def remove_booking(self, booking, equipment_lines):
+        """Write-through for a deleted booking"""
+        with self._lock:
+            day_index = self._days.get(booking.date)
+            if day_index is not None:
+                day_index.remove(booking.id, booking.court_id, booking.coach_id, booking.time_slot, equipment_lines)
+
+    def invalidate(self, dates=None):
+        """Drop the given dates (or everything) so they are reloaded on next read"""
+        with self._lock:
+            if dates is None:
+                self._days.clear()
+                return
+            for day in dates:
+                self._days.pop(day, None)
+
+
+availability_index = AvailabilityIndex()
+
+
+def slots_from_bits(bits):
+    return [slot for slot in TIME_SLOTS if bits & SLOT_BITS[slot]]
+
+
+def get_held_days(start_date, end_date, exclude_user_id=None):
+    """Unexpired holds from start_date to end_date as {date: DayIndex}.
+
+    Holds expire on their own, so they are read per request and kept out of
+    the cached booking index.
+    """
+    held = {}
+    for hold in get_active_holds(start_date, end_date, exclude_user_id=exclude_user_id):
+        day_index = held.setdefault(hold.date, DayIndex())
+        bit = SLOT_BITS.get(hold.time_slot, 0)
+        day_index.courts[hold.court_id] = day_index.courts.get(hold.court_id, 0) | bit
+        if hold.coach_id:
+            day_index.coaches[hold.coach_id] = day_index.coaches.get(hold.coach_id, 0) | bit
+        day_index.add_equipment(hold.time_slot, hold.equipment)
+    return held
+
+
+def get_occupancy(start_date, end_date=None, exclude_holds_of=None):
+    """Build the occupancy matrix for every date from start_date to end_date (inclusive).
+
+    Held slots and equipment count as taken, except the holds of exclude_holds_of.
+    """
+    end_date = end_date or start_date
+
+    dates = []
+    current = start_date
+    while current <= end_date:
+        dates.append(current)
+        current += timedelta(days=1)
+
+    stock = dict(db.session.query(Equipment.id, Equipment.total_available).all())
+    days = availability_index.get_days(dates)
+    held_days = get_held_days(start_date, end_date, exclude_holds_of)
+
+    occupancy = {}
+    for day in dates:
+        day_index = days[day]
+        held = held_days.get(day) or DayIndex()
+        courts = {court_id: day_index.courts.get(court_id, 0) | held.courts.get(court_id, 0)
+                  for court_id in day_index.courts.keys() | held.courts.keys()}
+        coaches = {coach_id: day_index.coaches.get(coach_id, 0) | held.coaches.get(coach_id, 0)
+                   for coach_id in day_index.coaches.keys() | held.coaches.keys()}
+
+        occupancy[day.strftime('%Y-%m-%d')] = {
+            'booked_time_slots': {
+                court_id: slots_from_bits(bits) for court_id, bits in courts.items() if bits
+            },
+            'coach_time_slots': {
+                coach_id: slots_from_bits(bits) for coach_id, bits in coaches.items() if bits
+            },
+            'equipment_availability': {
+                slot: {
+                    equipment_id: max(0, total - booked.get(equipment_id, 0)
+                                     - held.equipment[slot].get(equipment_id, 0))
+                    for equipment_id, total in stock.items()
+                } for slot, booked in day_index.equipment.items()
+            }
+        }
+
+    return occupancy
@@ -0,0 +1,203 @@
+# backup.py
+import glob
+import gzip
+import json
+import os
+import re
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Database pages copied per backup step; each step holds SQLite's read lock only briefly
+PAGES_PER_STEP = 256
+
+# Pause between steps, so a writer waiting on a rollback-journal database gets the lock
+STEP_PAUSE_SECONDS = 0.005
+
+# A rollback-journal backup restarts whenever another connection writes; give up after this many
+MAX_RESTARTS = 5
+
+# Status files are rewritten at most this often while pages are copied
+STATUS_INTERVAL_SECONDS = 0.5
+
+BACKUP_ID = re.compile(r'^courtbook-\d{8}-\d{6}-[0-9a-f]{6}$')
+
+
+class BackupError(Exception):
+    """Raised when a backup cannot be started or looked up; the message is shown to the admin"""
+
+
+class _TooBusy(Exception):
+    pass
+
+
+class BackupJob:
+    """One backup run; its status is kept in <id>.json next to the backup file.
+
+    The status file lets any worker process report on, and serve, a backup
+    another worker made.
+    """
+
+    def __init__(self, directory, compress):
+        self.id = f'courtbook-{datetime.utcnow().strftime("%Y%m%d-%H%M%S")}-{secrets.token_hex(3)}'
+        self.directory = directory
+        self.filename = self.id + ('.db.gz' if compress else '.db')
+        self.compress = compress
+        self.state = 'running'
+        self.pages_total = None
+        self.pages_copied = 0
+        self.restarts = 0
+        self.size = None
+        self.error = None
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self._saved_at = 0.0
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.filename)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'state': self.state,
+            'compressed': self.compress,
+            'pages_total': self.pages_total,
+            'pages_copied': self.pages_copied,
+            'progress': round(self.pages_copied / self.pages_total, 3) if self.pages_total else 0.0,
+            'restarts': self.restarts,
+            'size': self.size,
+            'error': self.error,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def save(self, force=True):
+        now = time.monotonic()
+        if not force and now - self._saved_at < STATUS_INTERVAL_SECONDS:
+            return
+        self._saved_at = now
+
+        status_path = os.path.join(self.directory, self.id + '.json')
+        with open(status_path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(status_path + '.tmp', status_path)
+
+
+def _copy_pages(job, database_path, target_path):
+    """Copy the live database into target_path with the online backup API, PAGES_PER_STEP at a time"""
+    source = sqlite3.connect(database_path, timeout=5, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        # In WAL mode an open read transaction pins a snapshot: the copy is consistent
+        # and never restarts, while writers carry on appending to the WAL
+        snapshot = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        if snapshot:
+            source.execute('BEGIN')
+            source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+
+        def progress(status, remaining, total):
+            copied = total - remaining
+            if copied < job.pages_copied:
+                # Another connection wrote to a rollback-journal database; SQLite starts over
+                job.restarts += 1
+                if job.restarts > MAX_RESTARTS:
+                    raise _TooBusy()
+            job.pages_total = total
+            job.pages_copied = copied
+            job.save(force=False)
+            time.sleep(STEP_PAUSE_SECONDS)
+
+        source.backup(target, pages=PAGES_PER_STEP, progress=progress)
+        if snapshot:
+            source.execute('COMMIT')
+    finally:
+        target.close()
+        source.close()
+
+
+def _compress(source_path, target_path):
+    with open(source_path, 'rb') as source, gzip.open(target_path, 'wb', compresslevel=6) as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+
+def _run(job, database_path):
+    part_path = os.path.join(job.directory, job.id + '.db.part')
+    try:
+        _copy_pages(job, database_path, part_path)
+        if job.compress:
+            job.state = 'compressing'
+            job.save()
+            _compress(part_path, job.path + '.part')
+            os.remove(part_path)
+            part_path = job.path + '.part'
+        os.replace(part_path, job.path)
+        job.size = os.path.getsize(job.path)
+        job.state = 'done'
+    except _TooBusy:
+        job.state = 'failed'
+        job.error = f'The database changed {MAX_RESTARTS} times during the backup; try again when it is quieter'
+    except (OSError, sqlite3.Error) as e:
+        job.state = 'failed'
+        job.error = str(e)
+    finally:
+        for leftover in (part_path, job.path + '.part'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        job.finished_at = datetime.utcnow()
+        job.save()
+
+
+class BackupManager:
+    """Runs one backup at a time per worker on a background thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = None
+
+    def start(self, database_path, directory, compress=False):
+        """Start backing up database_path into directory; returns the BackupJob"""
+        if not database_path or database_path == ':memory:':
+            raise BackupError('Only a file database can be backed up')
+
+        with self._lock:
+            if self._running is not None and self._running.is_alive():
+                raise BackupError('A backup is already running')
+
+            os.makedirs(directory, exist_ok=True)
+            job = BackupJob(directory, compress)
+            job.save()
+            self._running = threading.Thread(target=_run, args=(job, database_path), daemon=True,
+                                             name=f'backup-{job.id}')
+            self._running.start()
+        return job
+
+
+backup_manager = BackupManager()
+
+
+def get_backup(directory, backup_id):
+    """Status dict of a backup, or raises BackupError"""
+    if not BACKUP_ID.match(backup_id):
+        raise BackupError('Backup not found')
+    try:
+        with open(os.path.join(directory, backup_id + '.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise BackupError('Backup not found')
+
+
+def list_backups(directory, limit=20):
+    """Status dicts of the newest backups, newest first"""
+    backups = []
+    for status_path in sorted(glob.glob(os.path.join(directory, 'courtbook-*.json')), reverse=True)[:limit]:
+        try:
+            with open(status_path) as f:
+                backups.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return backups
@@ -0,0 +1,156 @@
+# benchmarks/contention.py
+"""Booking throughput with several worker processes on one SQLite file, per engine profile.
+
+Each writer process books its own court slots through reserve_booking() while
+reader processes keep scanning occupancy, like gunicorn workers serving the
+booking page. Every profile runs against a fresh database file.
+
+    python benchmarks/contention.py --writers 4 --readers 4 --bookings 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASE_DATE = date(2030, 1, 1)
+
+
+def _load_app(profile, uri):
+    os.environ['COURTBOOK_DB_PROFILE'] = profile
+    os.environ['COURTBOOK_DATABASE_URI'] = uri
+    from app import app
+    return app
+
+
+def _setup(profile, uri):
+    app = _load_app(profile, uri)
+    from models import db, User
+    from database import init_db, seed_data
+
+    with app.app_context():
+        init_db()
+        seed_data()
+        user = User(username='bench', email='bench@example.com', is_admin=False)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def _writer(profile, uri, user_id, worker, bookings, start, results):
+    app = _load_app(profile, uri)
+    from models import db, Court
+    from availability import TIME_SLOTS
+    from bookings import BookingError, reserve_booking
+
+    with app.app_context():
+        court = db.session.get(Court, 1)
+        start.wait()
+        booked = failed = 0
+        began = time.perf_counter()
+
+        for i in range(bookings):
+            # Each worker owns a block of dates, so every failure is lock contention
+            booking_date = BASE_DATE + timedelta(days=worker * 1000 + i // len(TIME_SLOTS))
+            try:
+                reserve_booking(user_id, court, booking_date, [TIME_SLOTS[i % len(TIME_SLOTS)]], total_price=600)
+                booked += 1
+            except BookingError:
+                failed += 1
+
+        results.put((booked, failed, time.perf_counter() - began))
+
+
+def _reader(profile, uri, start, stop, results):
+    app = _load_app(profile, uri)
+    from availability import availability_index, get_occupancy
+
+    with app.app_context():
+        start.wait()
+        reads = errors = 0
+        while not stop.is_set():
+            availability_index.invalidate()
+            try:
+                get_occupancy(BASE_DATE, BASE_DATE + timedelta(days=30))
+                reads += 1
+            except Exception:
+                errors += 1
+        results.put((reads, errors))
+
+
+def run_profile(profile, writers, readers, bookings):
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = 'sqlite:///' + os.path.join(tmp, 'contention.db')
+
+        setup = context.Pool(1)
+        user_id = setup.apply(_setup, (profile, uri))
+        setup.close()
+
+        start = context.Event()
+        stop = context.Event()
+        writer_results = context.Queue()
+        reader_results = context.Queue()
+
+        processes = [
+            context.Process(target=_writer, args=(profile, uri, user_id, w, bookings, start, writer_results))
+            for w in range(writers)
+        ]
+        readers_processes = [
+            context.Process(target=_reader, args=(profile, uri, start, stop, reader_results))
+            for _ in range(readers)
+        ]
+        for process in processes + readers_processes:
+            process.start()
+
+        # Give every process time to import the app before the clock starts
+        time.sleep(3)
+        began = time.perf_counter()
+        start.set()
+
+        writes = [writer_results.get() for _ in processes]
+        elapsed = time.perf_counter() - began
+        stop.set()
+        reads = [reader_results.get() for _ in readers_processes]
+
+        for process in processes + readers_processes:
+            process.join()
+
+    booked = sum(result[0] for result in writes)
+    return {
+        'profile': profile,
+        'booked': booked,
+        'failed': sum(result[1] for result in writes),
+        'seconds': round(elapsed, 2),
+        'bookings_per_second': round(booked / elapsed, 1),
+        'reads': sum(result[0] for result in reads),
+        'read_errors': sum(result[1] for result in reads)
+    }
+
+
+def main():
+    from database import ENGINE_PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--bookings', type=int, default=200, help='bookings per writer process')
+    parser.add_argument('--profiles', nargs='+', default=list(ENGINE_PROFILES), choices=list(ENGINE_PROFILES))
+    args = parser.parse_args()
+
+    print(f'{"profile":<12}{"booked":>8}{"failed":>8}{"seconds":>9}{"booked/s":>10}{"reads":>8}{"read errors":>13}')
+    for profile in args.profiles:
+        result = run_profile(profile, args.writers, args.readers, args.bookings)
+        print(f'{result["profile"]:<12}{result["booked"]:>8}{result["failed"]:>8}{result["seconds"]:>9}'
+              f'{result["bookings_per_second"]:>10}{result["reads"]:>8}{result["read_errors"]:>13}')
+
+
+if __name__ == '__main__':
+    main()
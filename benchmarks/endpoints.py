@@ -0,0 +1,167 @@
+# benchmarks/endpoints.py
+"""Latency and query counts of the booking-path endpoints against generated data.
+
+Fills a fresh SQLite file with generate_data.generate(), then drives the
+Flask test client through each endpoint and writes p50/p95 latency and
+statements per request to a JSON baseline. Pass --compare with an older
+baseline to print the change per endpoint.
+
+    python benchmarks/endpoints.py --bookings 1000000 --output baseline.json
+    python benchmarks/endpoints.py --bookings 1000000 --output new.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def _endpoints(today):
+    """(name, method, url(i), json body(i) or None, needs admin) per benchmarked endpoint"""
+    def future_day(i):
+        # A fresh date per booking, past the generated history
+        return (today + timedelta(days=400 + i)).strftime('%Y-%m-%d')
+
+    def history_day(i):
+        return (today - timedelta(days=i % 365)).strftime('%Y-%m-%d')
+
+    return [
+        ('check_availability', 'GET', lambda i: f'/api/check_availability?date={history_day(i)}&time=18:00',
+         None, False),
+        ('create_booking', 'POST', lambda i: '/api/bookings',
+         lambda i: {'court': {'id': 1}, 'date': future_day(i), 'timeSlot': '18:00', 'equipment': {'1': 1}}, False),
+        ('booking_history', 'GET', lambda i: '/api/bookings?limit=50', None, False),
+        ('admin_bookings', 'GET', lambda i: f'/admin/api/bookings?page={1 + i % 5}&per_page=50', None, True),
+        ('dashboard_stats', 'GET', lambda i: '/admin/api/dashboard/stats', None, True),
+        ('revenue_report', 'GET', lambda i: '/admin/api/reports/revenue', None, True),
+    ]
+
+
+def run(requests_per_endpoint, counts):
+    from sqlalchemy import event
+    from app import app
+    from models import db
+    from generate_data import PASSWORD
+
+    engines = []
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    statements = [0]
+
+    def count_statement(*args, **kwargs):
+        statements[0] += 1
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count_statement)
+
+    admin = app.test_client()
+    admin.post('/login', json={'username': f'bench{counts["first_user_id"]}', 'password': PASSWORD})
+    user = app.test_client()
+    user.post('/login', json={'username': f'bench{counts["first_user_id"] + 1}', 'password': PASSWORD})
+
+    results = {}
+    for name, method, url, body, needs_admin in _endpoints(date.today()):
+        client = admin if needs_admin else user
+        latencies = []
+        queries = []
+        for i in range(requests_per_endpoint):
+            statements[0] = 0
+            began = time.perf_counter()
+            response = client.open(url(i), method=method, json=body(i) if body else None)
+            latencies.append((time.perf_counter() - began) * 1000)
+            queries.append(statements[0])
+            if response.status_code != 200:
+                raise RuntimeError(f'{name} returned {response.status_code}')
+
+        # The first request warms the in-process caches; it is reported on its own
+        results[name] = {
+            'first_ms': round(latencies[0], 2),
+            'p50_ms': round(_percentile(latencies[1:] or latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies[1:] or latencies, 95), 2),
+            'queries_first': queries[0],
+            'queries_p50': statistics.median(queries[1:] or queries),
+            'queries_max': max(queries)
+        }
+
+    for engine in engines:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    print(f'{"endpoint":<22}{"p50 ms":>16}{"p95 ms":>16}{"queries p50":>16}')
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if not old:
+            print(f'{name:<22}{"(new)":>16}')
+            continue
+        print(f'{name:<22}'
+              f'{old["p50_ms"]:>7} → {result["p50_ms"]:<6}'
+              f'{old["p95_ms"]:>7} → {result["p95_ms"]:<6}'
+              f'{old["queries_p50"]:>7} → {result["queries_p50"]:<6}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50, help='requests per endpoint')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark-baseline.json')
+    parser.add_argument('--compare', help='earlier baseline JSON to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['COURTBOOK_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'benchmark.db')
+        from app import app
+        from generate_data import generate
+
+        began = time.perf_counter()
+        with app.app_context():
+            counts = generate(args.users, args.bookings, seed=args.seed)
+        generated_seconds = time.perf_counter() - began
+
+        results = run(args.requests, counts)
+
+    baseline = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'profile': app.config['DB_PROFILE'],
+        'data': dict(counts, generated_seconds=round(generated_seconds, 1)),
+        'requests_per_endpoint': args.requests,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
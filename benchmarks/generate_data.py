@@ -0,0 +1,168 @@
+# benchmarks/generate_data.py
+"""Bulk-generate users, courts, coaches, bookings and equipment lines for benchmarking.
+
+Rows are written with batched executemany INSERTs on one connection, so a
+million bookings take well under a minute on SQLite. Bookings fill the
+(court, date, slot) grid day by day going back from --end-date, which keeps
+the unique court and coach slot indexes satisfied.
+
+    python benchmarks/generate_data.py --database /tmp/bench.db --users 5000 --bookings 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BATCH_SIZE = 10000
+PASSWORD = 'benchmark'
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(users=1000, bookings=100000, courts=20, coaches=10, equipment_share=0.3, coach_share=0.2,
+             end_date=None, seed=1):
+    """Fill the bound database (inside an app context) with synthetic data; returns row counts.
+
+    The first generated user is an admin. Every user's password is PASSWORD.
+    """
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import db, User, Court, Coach, Equipment, Booking, BookingEquipment
+    from availability import TIME_SLOTS
+    from database import init_db, seed_data
+    from rollups import rebuild_rollups
+
+    rng = random.Random(seed)
+    end_date = end_date or date.today() + timedelta(days=30)
+
+    init_db()
+    seed_data()
+    now = datetime.utcnow()
+
+    with db.engine.begin() as conn:
+        first_user = (conn.execute(db.select(db.func.max(User.id))).scalar() or 0) + 1
+        password_hash = generate_password_hash(PASSWORD)
+        for batch in _batches({
+            'id': first_user + i,
+            'username': f'bench{first_user + i}',
+            'email': f'bench{first_user + i}@example.com',
+            'password_hash': password_hash,
+            'is_admin': i == 0,
+            'created_at': now
+        } for i in range(users)):
+            conn.execute(insert(User), batch)
+
+        extra_courts = max(0, courts - conn.execute(db.select(db.func.count(Court.id))).scalar())
+        if extra_courts:
+            conn.execute(insert(Court), [{
+                'name': f'Bench Court {i + 1}',
+                'type': 'indoor' if i % 2 else 'outdoor',
+                'base_price': 600 if i % 2 else 400,
+                'is_active': True,
+                'created_at': now
+            } for i in range(extra_courts)])
+
+        extra_coaches = max(0, coaches - conn.execute(db.select(db.func.count(Coach.id))).scalar())
+        if extra_coaches:
+            conn.execute(insert(Coach), [{
+                'name': f'Bench Coach {i + 1}',
+                'price': 500,
+                'specialization': 'Benchmark',
+                'created_at': now
+            } for i in range(extra_coaches)])
+
+        court_rows = conn.execute(db.select(Court.id, Court.base_price)).all()
+        coach_rows = conn.execute(db.select(Coach.id, Coach.price)).all()
+        equipment_rows = conn.execute(db.select(Equipment.id, Equipment.price)).all()
+        first_booking = (conn.execute(db.select(db.func.max(Booking.id))).scalar() or 0) + 1
+
+        def booking_rows():
+            # Walk the grid back from end_date; a coach is tied to one court so their slots never clash
+            slots_per_day = len(court_rows) * len(TIME_SLOTS)
+            for n in range(bookings):
+                day = end_date - timedelta(days=n // slots_per_day)
+                court_id, base_price = court_rows[n % len(court_rows)]
+                court_index = n % len(court_rows)
+                time_slot = TIME_SLOTS[(n // len(court_rows)) % len(TIME_SLOTS)]
+
+                coach_id = None
+                price = base_price
+                if court_index < len(coach_rows) and rng.random() < coach_share:
+                    coach_id, coach_price = coach_rows[court_index]
+                    price += coach_price
+
+                yield {
+                    'id': first_booking + n,
+                    'user_id': first_user + rng.randrange(users),
+                    'court_id': court_id,
+                    'coach_id': coach_id,
+                    'date': day,
+                    'time_slot': time_slot,
+                    'total_price': price,
+                    'created_at': now
+                }
+
+        def equipment_lines():
+            # Drawn from its own generator so the bookings stay the same for a given seed
+            line_rng = random.Random(seed + 1)
+            for n in range(bookings):
+                if line_rng.random() < equipment_share:
+                    for equipment_id, _ in line_rng.sample(equipment_rows, line_rng.randint(1, 2)):
+                        yield {'booking_id': first_booking + n, 'equipment_id': equipment_id,
+                               'quantity': line_rng.randint(1, 2)}
+
+        for batch in _batches(booking_rows()):
+            conn.execute(insert(Booking), batch)
+
+        lines = 0
+        for batch in _batches(equipment_lines()):
+            conn.execute(insert(BookingEquipment), batch)
+            lines += len(batch)
+
+    rebuild_rollups()
+
+    return {
+        'users': users,
+        'bookings': bookings,
+        'equipment_lines': lines,
+        'courts': len(court_rows),
+        'coaches': len(coach_rows),
+        'first_user_id': first_user
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help='SQLite file to fill (created if missing)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--courts', type=int, default=20)
+    parser.add_argument('--coaches', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ['COURTBOOK_DATABASE_URI'] = 'sqlite:///' + os.path.abspath(args.database)
+    from app import app
+
+    began = time.perf_counter()
+    with app.app_context():
+        counts = generate(args.users, args.bookings, args.courts, args.coaches, seed=args.seed)
+    print(f'Generated {counts} in {time.perf_counter() - began:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+# bookings.py
+import secrets
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import db, Booking, BookingEquipment, SlotHold
+from holds import HOLD_SECONDS, purge_expired_holds, get_active_holds, held_equipment
+from availability import TIME_SLOTS, availability_index
+from rollups import apply_to_rollups
+from reports import revenue_report_cache
+from events import publish_slot_changes
+
+# SQLite result codes (the primary code is the low byte of an extended code)
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+# Attempts for one reservation when another request wins a slot or holds the write lock
+BOOKING_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.05
+
+# Committed booking rows, detached from the session so reading them costs no query
+ReservedSlot = namedtuple('ReservedSlot', ['id', 'date', 'time_slot', 'court_id', 'coach_id', 'total_price'])
+
+# Most occurrences one recurring booking request may reserve (a weekly season)
+MAX_OCCURRENCES = 52
+
+# A committed slot hold
+Hold = namedtuple('Hold', ['token', 'date', 'time_slots', 'expires_at'])
+
+
+class BookingError(Exception):
+    """Raised when a booking cannot be reserved; the message is shown to the user.
+
+    reason is a short code for metrics: court_conflict, coach_conflict,
+    court_held, coach_held, equipment_unavailable, busy or invalid.
+    """
+
+    def __init__(self, message, reason='invalid'):
+        super().__init__(message)
+        self.reason = reason
+
+
+def is_lock_error(error):
+    """Whether an OperationalError is SQLite being busy or locked, which a retry can get past"""
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED)
+    return 'database is locked' in str(error.orig) or 'database table is locked' in str(error.orig)
+
+
+def get_booking_slots(data):
+    """Resolve the slots of a booking request from timeSlots/timeSlot and duration"""
+    time_slots = data.get('timeSlots') or [data.get('timeSlot')]
+
+    if not isinstance(time_slots, list) or not all(slot in TIME_SLOTS for slot in time_slots):
+        raise BookingError('Invalid time slot')
+
+    indexes = sorted(TIME_SLOTS.index(slot) for slot in time_slots)
+    if indexes != list(range(indexes[0], indexes[0] + len(indexes))):
+        raise BookingError('Time slots must be consecutive')
+
+    try:
+        duration = int(data.get('duration') or len(time_slots))
+    except (TypeError, ValueError):
+        raise BookingError('Duration must be a whole number of hours')
+    if duration != len(time_slots):
+        raise BookingError('Duration does not match the selected time slots')
+
+    return [TIME_SLOTS[i] for i in indexes]
+
+
+def _split_price(total_price, slots):
+    """Spread a booking's price over its slot rows so they add up to the quoted total"""
+    slot_price, remainder = divmod(total_price, slots)
+    return [slot_price + remainder] + [slot_price] * (slots - 1)
+
+
+def _check_conflicts(court_id, coach_id, booking_date, time_slots):
+    conflict = Booking.court_id == court_id
+    if coach_id:
+        conflict = conflict | (Booking.coach_id == coach_id)
+
+    clashes = Booking.query.filter(
+        Booking.date == booking_date,
+        Booking.time_slot.in_(time_slots),
+        conflict
+    ).all()
+
+    for clash in clashes:
+        if clash.court_id == court_id:
+            raise BookingError('Court already booked for this timeslot', 'court_conflict')
+    if clashes:
+        raise BookingError('Coach already booked for this timeslot', 'coach_conflict')
+
+
+def _check_holds(user_id, court_id, coach_id, booking_date, time_slots):
+    """Refuse slots another player holds; run after the flush so concurrent holds are seen"""
+    for hold in get_active_holds(booking_date, booking_date, time_slots, exclude_user_id=user_id):
+        if hold.court_id == court_id:
+            raise BookingError('Court is on hold by another player for this timeslot', 'court_held')
+        if coach_id and hold.coach_id == coach_id:
+            raise BookingError('Coach is on hold by another player for this timeslot', 'coach_held')
+
+
+def _check_equipment_stock(booking_date, time_slots, equipment, exclude_holds_of=None):
+    """Verify stock after our own rows are flushed, so concurrent reservations are counted.
+
+    Equipment in unexpired holds counts as taken, except holds of exclude_holds_of.
+    """
+    held = held_equipment(get_active_holds(booking_date, booking_date, time_slots, exclude_user_id=exclude_holds_of))
+
+    booked = db.session.query(
+        BookingEquipment.equipment_id,
+        Booking.time_slot,
+        db.func.sum(BookingEquipment.quantity)
+    ).join(Booking, Booking.id == BookingEquipment.booking_id).filter(
+        Booking.date == booking_date,
+        Booking.time_slot.in_(time_slots),
+        BookingEquipment.equipment_id.in_([item.id for item in equipment])
+    ).group_by(BookingEquipment.equipment_id, Booking.time_slot).all()
+
+    booked = {(equipment_id, time_slot): quantity for equipment_id, time_slot, quantity in booked}
+    for item in equipment:
+        for time_slot in time_slots:
+            taken = booked.get((item.id, time_slot), 0) + held.get((item.id, time_slot), 0)
+            if taken > item.total_available:
+                raise BookingError(f'Not enough {item.name} available at {time_slot}', 'equipment_unavailable')
+
+
+def _reserve(user_id, court, booking_date, time_slots, coach, equipment, total_price, hold_token):
+    coach_id = coach.id if coach else None
+    _check_conflicts(court.id, coach_id, booking_date, time_slots)
+
+    bookings = [
+        Booking(
+            user_id=user_id,
+            court_id=court.id,
+            coach_id=coach_id,
+            date=booking_date,
+            time_slot=time_slot,
+            total_price=slot_price
+        ) for time_slot, slot_price in zip(time_slots, _split_price(total_price, len(time_slots)))
+    ]
+    db.session.add_all(bookings)
+
+    # The flush takes SQLite's write lock; the unique indexes reject double bookings here
+    db.session.flush()
+    _check_holds(user_id, court.id, coach_id, booking_date, time_slots)
+
+    if equipment:
+        db.session.add_all([
+            BookingEquipment(booking_id=booking.id, equipment_id=item.id, quantity=quantity)
+            for booking in bookings
+            for item, quantity in equipment.items()
+        ])
+        db.session.flush()
+        _check_equipment_stock(booking_date, time_slots, equipment, exclude_holds_of=user_id)
+
+    # The booking replaces the player's hold
+    if hold_token:
+        SlotHold.query.filter_by(token=hold_token, user_id=user_id).delete(synchronize_session=False)
+
+    apply_to_rollups([
+        (booking_date, court.id, coach_id, booking.total_price) for booking in bookings
+    ])
+
+    return bookings
+
+
+def reserve_booking(user_id, court, booking_date, time_slots, coach=None, equipment=None, total_price=0,
+                    hold_token=None):
+    """Reserve every slot of a booking plus its coach and equipment, all or nothing.
+
+    equipment maps Equipment rows to quantities. Holds of other players block
+    the booking; the player's own hold_token is released with it. Returns a
+    ReservedSlot per booked slot, or raises BookingError.
+    """
+    equipment = equipment or {}
+
+    for attempt in range(BOOKING_RETRIES):
+        try:
+            bookings = [
+                ReservedSlot(b.id, b.date, b.time_slot, b.court_id, b.coach_id, b.total_price)
+                for b in _reserve(user_id, court, booking_date, time_slots, coach, equipment, total_price, hold_token)
+            ]
+            equipment_lines = [(item.id, quantity) for item, quantity in equipment.items()]
+            db.session.commit()
+        except BookingError:
+            db.session.rollback()
+            raise
+        except IntegrityError:
+            # Another request took one of the slots after our check; re-check against fresh data
+            db.session.rollback()
+            availability_index.invalidate([booking_date])
+            continue
+        except OperationalError as e:
+            # Database locked by a concurrent writer; anything else is a real failure
+            db.session.rollback()
+            if not is_lock_error(e):
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * (attempt + 1))
+            continue
+
+        for booking in bookings:
+            availability_index.add_booking(booking, equipment_lines)
+        revenue_report_cache.invalidate([booking_date])
+        publish_slot_changes('slot_taken', bookings, lambda booking: equipment_lines)
+        return bookings
+
+    raise BookingError('Booking could not be completed, please try again', 'busy')
+
+
+def _find_recurring_conflicts(user_id, court_id, coach_id, occurrences, equipment):
+    """{occurrence index: reason} for occurrences that cannot be booked.
+
+    Bookings, holds and booked equipment are each read once for every
+    (date, slot) of the request.
+    """
+    slot_occurrence = {}
+    conflicts = {}
+    for i, (day, time_slots) in enumerate(occurrences):
+        for time_slot in time_slots:
+            if (day, time_slot) in slot_occurrence:
+                conflicts[i] = 'Repeats another occurrence of this request'
+            slot_occurrence.setdefault((day, time_slot), i)
+    pairs = list(slot_occurrence)
+
+    def conflict(day, time_slot, reason):
+        conflicts.setdefault(slot_occurrence[day, time_slot], f'{reason} at {time_slot}')
+
+    clash = Booking.court_id == court_id
+    if coach_id:
+        clash = clash | (Booking.coach_id == coach_id)
+    for day, time_slot, booked_court_id in db.session.query(
+            Booking.date, Booking.time_slot, Booking.court_id
+    ).filter(tuple_(Booking.date, Booking.time_slot).in_(pairs), clash):
+        conflict(day, time_slot, 'Court already booked' if booked_court_id == court_id else 'Coach already booked')
+
+    days = [day for day, _ in occurrences]
+    held = {}
+    for hold in get_active_holds(min(days), max(days), exclude_user_id=user_id):
+        if (hold.date, hold.time_slot) not in slot_occurrence:
+            continue
+        if hold.court_id == court_id:
+            conflict(hold.date, hold.time_slot, 'Court is on hold by another player')
+        elif coach_id and hold.coach_id == coach_id:
+            conflict(hold.date, hold.time_slot, 'Coach is on hold by another player')
+        for equipment_id, quantity in hold.equipment:
+            key = (hold.date, hold.time_slot, equipment_id)
+            held[key] = held.get(key, 0) + quantity
+
+    if equipment:
+        booked = dict(((day, time_slot, equipment_id), quantity) for day, time_slot, equipment_id, quantity in
+                      db.session.query(
+                          Booking.date, Booking.time_slot, BookingEquipment.equipment_id,
+                          db.func.sum(BookingEquipment.quantity)
+                      ).join(Booking, Booking.id == BookingEquipment.booking_id).filter(
+                          tuple_(Booking.date, Booking.time_slot).in_(pairs),
+                          BookingEquipment.equipment_id.in_([item.id for item in equipment])
+                      ).group_by(Booking.date, Booking.time_slot, BookingEquipment.equipment_id))
+
+        for day, time_slot in pairs:
+            for item, quantity in equipment.items():
+                key = (day, time_slot, item.id)
+                if booked.get(key, 0) + held.get(key, 0) + quantity > item.total_available:
+                    conflict(day, time_slot, f'Not enough {item.name} available')
+
+    return conflicts
+
+
+def reserve_recurring(user_id, court, occurrences, prices, coach=None, equipment=None, all_or_nothing=False):
+    """Book many (date, time_slots) occurrences of one court/coach/equipment selection in one transaction.
+
+    prices holds each occurrence's total price. Conflicts for every occurrence
+    are found up front with set-based queries, and the free occurrences are
+    inserted in bulk; with all_or_nothing, any conflict books nothing.
+
+    Returns (booked, conflicts): booked is [(occurrence index, [ReservedSlot])]
+    and conflicts is {occurrence index: reason}.
+    """
+    equipment = equipment or {}
+    court_id = court.id
+    coach_id = coach.id if coach else None
+    equipment_lines = [(item.id, quantity) for item, quantity in equipment.items()]
+
+    for attempt in range(BOOKING_RETRIES):
+        try:
+            # Purging expired holds takes the write lock first, so the checks below
+            # stay true until commit
+            purge_expired_holds()
+            conflicts = _find_recurring_conflicts(user_id, court_id, coach_id, occurrences, equipment)
+            if conflicts and all_or_nothing:
+                db.session.rollback()
+                return [], conflicts
+
+            rows = []
+            for i, (day, time_slots) in enumerate(occurrences):
+                if i in conflicts:
+                    continue
+                for time_slot, slot_price in zip(time_slots, _split_price(prices[i], len(time_slots))):
+                    rows.append({
+                        'user_id': user_id,
+                        'court_id': court_id,
+                        'coach_id': coach_id,
+                        'date': day,
+                        'time_slot': time_slot,
+                        'total_price': slot_price
+                    })
+            if not rows:
+                db.session.rollback()
+                return [], conflicts
+
+            # Multi-row INSERT ... RETURNING; rows are matched back by their (date, slot),
+            # which is unique within the request
+            inserted = db.session.execute(
+                insert(Booking).returning(Booking.id, Booking.date, Booking.time_slot), rows
+            ).all()
+            ids_by_slot = {(day, time_slot): booking_id for booking_id, day, time_slot in inserted}
+            booking_ids = [ids_by_slot[row['date'], row['time_slot']] for row in rows]
+            if equipment:
+                db.session.execute(insert(BookingEquipment), [
+                    {'booking_id': booking_id, 'equipment_id': item.id, 'quantity': quantity}
+                    for booking_id in booking_ids
+                    for item, quantity in equipment.items()
+                ])
+
+            apply_to_rollups([
+                (row['date'], court_id, coach_id, row['total_price']) for row in rows
+            ])
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            continue
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_lock_error(e):
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * (attempt + 1))
+            continue
+
+        slots = [
+            ReservedSlot(booking_id, row['date'], row['time_slot'], court_id, coach_id, row['total_price'])
+            for booking_id, row in zip(booking_ids, rows)
+        ]
+        for booking in slots:
+            availability_index.add_booking(booking, equipment_lines)
+        revenue_report_cache.invalidate({booking.date for booking in slots})
+        publish_slot_changes('slot_taken', slots, lambda booking: equipment_lines)
+
+        by_date = {}
+        for booking in slots:
+            by_date.setdefault(booking.date, []).append(booking)
+        booked = []
+        for i, (day, time_slots) in enumerate(occurrences):
+            if i not in conflicts:
+                booked.append((i, [booking for booking in by_date[day] if booking.time_slot in time_slots]))
+        return booked, conflicts
+
+    raise BookingError('Booking could not be completed, please try again', 'busy')
+
+
+def create_hold(user_id, court, booking_date, time_slots, coach=None, equipment=None):
+    """Hold the slots, coach and equipment of a booking for HOLD_SECONDS.
+
+    A player has at most one hold; a new one replaces it. Returns a Hold, or
+    raises BookingError if the selection is booked or held by someone else.
+    """
+    equipment = equipment or {}
+    coach_id = coach.id if coach else None
+    equipment_lines = [[item.id, quantity] for item, quantity in equipment.items()]
+
+    for attempt in range(BOOKING_RETRIES):
+        try:
+            # Clearing expired holds first takes the write lock and frees their unique keys
+            now = datetime.utcnow()
+            purge_expired_holds(now)
+            SlotHold.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            _check_conflicts(court.id, coach_id, booking_date, time_slots)
+
+            token = secrets.token_hex(16)
+            expires_at = now + timedelta(seconds=HOLD_SECONDS)
+            db.session.add_all([
+                SlotHold(
+                    token=token,
+                    user_id=user_id,
+                    court_id=court.id,
+                    coach_id=coach_id,
+                    date=booking_date,
+                    time_slot=time_slot,
+                    equipment=equipment_lines,
+                    expires_at=expires_at
+                ) for time_slot in time_slots
+            ])
+            db.session.flush()
+
+            if equipment:
+                _check_equipment_stock(booking_date, time_slots, equipment)
+            db.session.commit()
+        except BookingError:
+            db.session.rollback()
+            raise
+        except IntegrityError as e:
+            # The unique hold indexes: another player holds the court or coach
+            db.session.rollback()
+            if 'slot_holds.coach_id' in str(e.orig):
+                raise BookingError('Someone else is holding this coach at this time, please choose another',
+                                   'coach_held')
+            raise BookingError('Someone else is holding this slot, please choose another', 'court_held')
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_lock_error(e):
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * (attempt + 1))
+            continue
+
+        return Hold(token, booking_date, time_slots, expires_at)
+
+    raise BookingError('Hold could not be placed, please try again', 'busy')
+
+
+def release_hold(user_id, token):
+    """Release a player's hold; returns whether there was one"""
+    released = SlotHold.query.filter_by(token=token, user_id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+    return released > 0
+
+
+def delete_bookings(*criterion):
+    """Delete the bookings matching criterion, with their equipment lines, in the current transaction.
+
+    The rollups are updated in the same transaction. Returns the removed rows;
+    pass them to bookings_removed() once the caller has committed.
+    """
+    rows = db.session.query(
+        Booking.id, Booking.date, Booking.time_slot, Booking.court_id,
+        Booking.coach_id, Booking.total_price
+    ).filter(*criterion).all()
+
+    if not rows:
+        return []
+
+    booking_ids = [row.id for row in rows]
+    lines = {}
+    for booking_id, equipment_id, quantity in db.session.query(
+            BookingEquipment.booking_id, BookingEquipment.equipment_id, BookingEquipment.quantity
+    ).filter(BookingEquipment.booking_id.in_(booking_ids)):
+        lines.setdefault(booking_id, []).append((equipment_id, quantity))
+
+    BookingEquipment.query.filter(BookingEquipment.booking_id.in_(booking_ids)).delete(synchronize_session=False)
+    Booking.query.filter(Booking.id.in_(booking_ids)).delete(synchronize_session=False)
+
+    apply_to_rollups([
+        (row.date, row.court_id, row.coach_id, row.total_price) for row in rows
+    ], sign=-1)
+
+    return [
+        (ReservedSlot(row.id, row.date, row.time_slot, row.court_id, row.coach_id, row.total_price),
+         lines.get(row.id, []))
+        for row in rows
+    ]
+
+
+def bookings_removed(removed):
+    """Post-commit bookkeeping for rows returned by delete_bookings()"""
+    for booking, equipment_lines in removed:
+        availability_index.remove_booking(booking, equipment_lines)
+    revenue_report_cache.invalidate({booking.date for booking, _ in removed})
+
+    lines = {booking.id: equipment_lines for booking, equipment_lines in removed}
+    publish_slot_changes('slot_freed', [booking for booking, _ in removed], lambda booking: lines[booking.id])
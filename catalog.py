@@ -0,0 +1,70 @@
+# catalog.py
+import threading
+import time
+from models import Court, Equipment, Coach
+
+# Catalog entries are rebuilt after an admin edit in this process, and at least this
+# often so that edits made through other worker processes are picked up
+CATALOG_TTL_SECONDS = 60
+
+
+class CatalogCache:
+    """Courts, equipment, coaches and pricing, cached per global catalog version.
+
+    Admin create/update/delete routes call bump() after committing; every
+    entry built for an older version is rebuilt on its next read.
+    """
+
+    def __init__(self, ttl=CATALOG_TTL_SECONDS):
+        self.ttl = ttl
+        self.version = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, build):
+        """Return the cached value of name, calling build() if it is missing, outdated or expired"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                version, built_at, value = entry
+                if version == self.version and time.monotonic() - built_at < self.ttl:
+                    return value
+
+            value = build()
+            self._entries[name] = (self.version, time.monotonic(), value)
+            return value
+
+    def bump(self):
+        """Start a new catalog version after courts, equipment, coaches or pricing rules change"""
+        with self._lock:
+            self.version += 1
+
+
+catalog_cache = CatalogCache()
+
+
+def get_court_list():
+    return catalog_cache.get('courts', lambda: [{
+        'id': court.id,
+        'name': court.name,
+        'type': court.type,
+        'base_price': court.base_price
+    } for court in Court.query.all()])
+
+
+def get_equipment_list():
+    return catalog_cache.get('equipment', lambda: [{
+        'id': eq.id,
+        'name': eq.name,
+        'price': eq.price,
+        'available': eq.total_available
+    } for eq in Equipment.query.all()])
+
+
+def get_coach_list():
+    return catalog_cache.get('coaches', lambda: [{
+        'id': coach.id,
+        'name': coach.name,
+        'price': coach.price,
+        'specialization': coach.specialization
+    } for coach in Coach.query.all()])
@@ -1,10 +1,86 @@
 # database.py
+import os
+from sqlalchemy import event
 from models import db, User, Court, Equipment, Coach, PricingRule
+from migrations import run_migrations
+from routing import READ_BIND_KEY, select_engine_for_request
+
+DEFAULT_DATABASE_URI = 'sqlite:///courtbook.db'
+
+# Engine profiles, selected with the COURTBOOK_DB_PROFILE environment variable.
+# pragmas are applied to every new SQLite connection; engine_options go to create_engine.
+ENGINE_PROFILES = {
+    # SQLAlchemy defaults: rollback journal, readers and the writer lock each other out
+    'basic': {
+        'pragmas': {},
+        'engine_options': {}
+    },
+    # Several gunicorn workers on one file. WAL lets readers run while a booking
+    # is being written; writers queue on the busy timeout instead of failing.
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -20000  # KiB
+        },
+        'engine_options': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'pool_recycle': 3600
+        }
+    }
+}
+DEFAULT_ENGINE_PROFILE = 'production'
+
+
+def _set_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return on_connect
+
+
+def configure_database(app):
+    """Bind db to app using COURTBOOK_DATABASE_URI and the COURTBOOK_DB_PROFILE engine profile"""
+    profile_name = os.environ.get('COURTBOOK_DB_PROFILE', DEFAULT_ENGINE_PROFILE)
+    if profile_name not in ENGINE_PROFILES:
+        raise ValueError(f'Unknown database profile {profile_name!r}; expected one of {", ".join(ENGINE_PROFILES)}')
+    profile = ENGINE_PROFILES[profile_name]
+
+    uri = os.environ.get('COURTBOOK_DATABASE_URI', DEFAULT_DATABASE_URI)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(profile['engine_options'])
+    # Second engine on the same database for read-only requests (see routing.py)
+    app.config['SQLALCHEMY_BINDS'] = {READ_BIND_KEY: dict(profile['engine_options'], url=uri)}
+    app.config['DB_PROFILE'] = profile_name
+    db.init_app(app)
+    app.before_request(select_engine_for_request)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            if profile['pragmas']:
+                event.listen(db.engine, 'connect', _set_sqlite_pragmas(profile['pragmas']))
+
+            # The journal mode is a property of the file and is set by the write engine
+            read_pragmas = {name: value for name, value in profile['pragmas'].items() if name != 'journal_mode'}
+            read_pragmas['query_only'] = 'ON'
+            event.listen(db.engines[READ_BIND_KEY], 'connect', _set_sqlite_pragmas(read_pragmas))
+
+        # Bring an existing database file up to the schema the code expects before serving requests
+        init_db()
 
 
 def init_db():
     db.create_all()
 
+    # create_all skips existing tables, so older database files are upgraded in place
+    run_migrations()
+
 
 def seed_data():
     # Only seed if tables are empty
@@ -11,4 +11,24 @@ def admin_required(f):
         if not current_user.is_admin:
             return jsonify({'success': False, 'message': 'Admin access required'}), 403
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+
+def read_only(f):
+    """Use the read-only database engine for this view whatever the request method"""
+    f.db_access = 'read'
+    return f
+
+
+def read_write(f):
+    """Use the write engine for this view even on GET (e.g. a GET that records something)"""
+    f.db_access = 'write'
+    return f
+
+
+def query_budget(statements):
+    """Most SQL statements the view may run; checked when SQL instrumentation is on"""
+    def decorator(f):
+        f.query_budget = statements
+        return f
+    return decorator
@@ -0,0 +1,125 @@
+# events.py
+import json
+import queue
+import threading
+import time
+
+# Comment line sent to an idle stream so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+# Events buffered per subscriber; a subscriber that falls further behind gets a resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Client reconnect delay sent at the start of every stream
+RECONNECT_MILLISECONDS = 3000
+
+# A stream is closed after this long and the browser reconnects and reloads the date, so
+# a worker thread is never tied to one page indefinitely
+STREAM_MAX_SECONDS = 300
+
+
+class Subscription:
+    def __init__(self, day):
+        self.day = day
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class AvailabilityBroadcaster:
+    """In-process fan-out of booking changes to the streams watching each date.
+
+    Publishing only touches the subscribers of the affected date, and an idle
+    subscriber costs a queue and a blocked wait. Only changes made by this
+    worker process are seen; clients re-fetch availability when they reconnect.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, day):
+        subscription = Subscription(day)
+        with self._lock:
+            self._subscribers.setdefault(day, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.day)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.day]
+
+    def publish(self, day, event_type, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(day, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait((event_type, data))
+            except queue.Full:
+                subscription.overflowed = True
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+availability_broadcaster = AvailabilityBroadcaster()
+
+
+def format_event(event_type, data):
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+def publish_slot_changes(event_type, bookings, equipment_lines_for):
+    """Publish slot_taken/slot_freed for committed ReservedSlots.
+
+    equipment_lines_for(booking) returns the booking's [(equipment_id, quantity)].
+    """
+    for booking in bookings:
+        availability_broadcaster.publish(booking.date, event_type, {
+            'date': booking.date.strftime('%Y-%m-%d'),
+            'time_slot': booking.time_slot,
+            'court_id': booking.court_id,
+            'coach_id': booking.coach_id,
+            'equipment': [[equipment_id, quantity] for equipment_id, quantity in equipment_lines_for(booking)]
+        })
+
+
+def stream_events(day):
+    """Server-Sent Events of one date until the client disconnects or STREAM_MAX_SECONDS pass.
+
+    The subscription is made once the stream starts, so a response that is
+    never iterated leaves nothing subscribed. Each open stream occupies a
+    worker thread (or greenlet), so serve the app with gunicorn's gthread or
+    gevent workers; see gunicorn.conf.py.
+    """
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    subscription = None
+    try:
+        subscription = availability_broadcaster.subscribe(day)
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event_type, data = subscription.queue.get(timeout=min(KEEPALIVE_SECONDS, remaining))
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+
+            if subscription.overflowed:
+                # Events were dropped; tell the client to reload the date instead
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield format_event('resync', {'date': subscription.day.strftime('%Y-%m-%d')})
+                continue
+
+            yield format_event(event_type, data)
+    finally:
+        if subscription is not None:
+            availability_broadcaster.unsubscribe(subscription)
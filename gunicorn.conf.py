@@ -0,0 +1,11 @@
+# gunicorn.conf.py - read by gunicorn when started from this directory
+import os
+
+# /api/availability/stream keeps a request open for every booking page. Sync workers serve one
+# request at a time and are killed after `timeout` seconds in one response, so a few open pages
+# would take every worker; threaded workers keep serving while streams are open.
+# For thousands of open pages, pip install gevent and set COURTBOOK_WORKER_CLASS=gevent.
+worker_class = os.environ.get('COURTBOOK_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('COURTBOOK_WORKERS', 4))
+threads = int(os.environ.get('COURTBOOK_THREADS', 32))
+worker_connections = int(os.environ.get('COURTBOOK_WORKER_CONNECTIONS', 1000))
@@ -0,0 +1,42 @@
+# holds.py
+from datetime import datetime
+from models import db, SlotHold
+
+# How long a hold keeps a slot for the player who picked it
+HOLD_SECONDS = 300
+
+
+def purge_expired_holds(now=None):
+    """Delete expired holds; a range scan on the expires_at index"""
+    SlotHold.query.filter(
+        SlotHold.expires_at <= (now or datetime.utcnow())
+    ).delete(synchronize_session=False)
+
+
+def get_active_holds(start_date, end_date, time_slots=None, exclude_user_id=None):
+    """Unexpired hold rows from start_date to end_date, optionally limited to some slots"""
+    query = db.session.query(
+        SlotHold.date,
+        SlotHold.time_slot,
+        SlotHold.court_id,
+        SlotHold.coach_id,
+        SlotHold.equipment
+    ).filter(
+        SlotHold.date >= start_date,
+        SlotHold.date <= end_date,
+        SlotHold.expires_at > datetime.utcnow()
+    )
+    if time_slots is not None:
+        query = query.filter(SlotHold.time_slot.in_(time_slots))
+    if exclude_user_id is not None:
+        query = query.filter(SlotHold.user_id != exclude_user_id)
+    return query.all()
+
+
+def held_equipment(holds):
+    """{(equipment_id, time_slot): quantity} held by the given hold rows"""
+    held = {}
+    for hold in holds:
+        for equipment_id, quantity in hold.equipment:
+            held[equipment_id, hold.time_slot] = held.get((equipment_id, hold.time_slot), 0) + quantity
+    return held
@@ -0,0 +1,222 @@
+# instrumentation.py
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements kept per request, slowest first
+SLOWEST_STATEMENTS = 5
+
+# Requests kept for the admin endpoint
+RECENT_REQUESTS = 200
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'IN \((?:\?(?:, )?)+\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block ran more SQL statements than its budget"""
+
+
+def fingerprint(statement):
+    """Statement text with literals and IN lists folded, so repeats of one query compare equal"""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    return _IN_LIST.sub('IN (?)', statement)
+
+
+class StatementStats:
+    """Statements run by one request or one measured block"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest = []
+        self.fingerprints = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+        self.slowest.append((seconds, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[SLOWEST_STATEMENTS:]
+
+    def repeated(self):
+        """[(fingerprint, times)] of statements run more than once, the likely N+1s"""
+        return [(sql, times) for sql, times in self.fingerprints.most_common() if times > 1]
+
+    def to_dict(self):
+        return {
+            'statements': self.count,
+            'dbTimeMs': round(self.total_seconds * 1000, 2),
+            'slowest': [{'ms': round(seconds * 1000, 2), 'sql': statement} for seconds, statement in self.slowest],
+            'repeated': [{'sql': sql, 'times': times} for sql, times in self.repeated()]
+        }
+
+
+_local = threading.local()
+
+
+def _collectors():
+    """Collectors that the current thread's statements are recorded into"""
+    collectors = list(getattr(_local, 'blocks', ()))
+    if has_request_context():
+        collectors.extend(g.get('sql_collectors', ()))
+    return collectors
+
+
+def collect_request_statements(collector):
+    """Record the current request's statements into collector.record(statement, seconds)"""
+    g.setdefault('sql_collectors', []).append(collector)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_started'].pop()
+    for stats in _collectors():
+        stats.record(statement, seconds)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def install():
+    """Time every statement of every engine; idempotent"""
+    if not event.contains(Engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+
+class RequestLog:
+    """Recent instrumented requests and per-endpoint totals, for the admin endpoint"""
+
+    def __init__(self, size=RECENT_REQUESTS):
+        self.recent = deque(maxlen=size)
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, method, path, stats):
+        entry = dict(stats.to_dict(), endpoint=endpoint, method=method, path=path)
+        with self._lock:
+            self.recent.append(entry)
+            totals = self.endpoints.setdefault(endpoint, {
+                'requests': 0, 'statements': 0, 'maxStatements': 0, 'dbTimeMs': 0.0, 'repeated': Counter()
+            })
+            totals['requests'] += 1
+            totals['statements'] += stats.count
+            totals['maxStatements'] = max(totals['maxStatements'], stats.count)
+            totals['dbTimeMs'] += stats.total_seconds * 1000
+            for sql, times in stats.repeated():
+                totals['repeated'][sql] = max(totals['repeated'][sql], times)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'endpoints': {
+                    endpoint: {
+                        'requests': totals['requests'],
+                        'avgStatements': round(totals['statements'] / totals['requests'], 2),
+                        'maxStatements': totals['maxStatements'],
+                        'avgDbTimeMs': round(totals['dbTimeMs'] / totals['requests'], 2),
+                        'repeated': [{'sql': sql, 'times': times} for sql, times in totals['repeated'].most_common(5)]
+                    } for endpoint, totals in self.endpoints.items()
+                },
+                'recent': list(self.recent)
+            }
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self.endpoints.clear()
+
+
+request_log = RequestLog()
+
+
+def _start_request():
+    g.sql_stats = StatementStats()
+    collect_request_statements(g.sql_stats)
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+
+    response.headers['X-DB-Statements'] = str(stats.count)
+    response.headers['X-DB-Time-Ms'] = f'{stats.total_seconds * 1000:.2f}'
+    response.headers['X-DB-Repeated'] = str(len(stats.repeated()))
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        response.headers['X-DB-Budget-Exceeded'] = f'{stats.count}/{budget}'
+        message = f'{request.endpoint} ran {stats.count} statements, over its budget of {budget}'
+        if current_app.config.get('SQL_BUDGET_STRICT'):
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+
+    request_log.add(request.endpoint, request.method, request.full_path.rstrip('?'), stats)
+    return response
+
+
+def instrumentation_enabled(app):
+    return bool(app.config.get('SQL_INSTRUMENTATION')) or os.environ.get('COURTBOOK_SQL_INSTRUMENTATION') == '1'
+
+
+def init_instrumentation(app):
+    """Record per-request SQL statistics when SQL_INSTRUMENTATION or COURTBOOK_SQL_INSTRUMENTATION=1 is set.
+
+    Adds X-DB-Statements, X-DB-Time-Ms and X-DB-Repeated response headers, and
+    checks the budgets declared with decorators.query_budget.
+    """
+    if not instrumentation_enabled(app):
+        return
+
+    app.config['SQL_INSTRUMENTATION'] = True
+    install()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+@contextmanager
+def assert_max_queries(budget):
+    """Fail with QueryBudgetExceeded if the block runs more than budget statements.
+
+        with assert_max_queries(4):
+            client.get('/api/check_availability?date=2025-01-01&time=18:00')
+
+    Statements are timed from first use on, so this works without SQL_INSTRUMENTATION.
+    """
+    install()
+    stats = StatementStats()
+    blocks = getattr(_local, 'blocks', None)
+    if blocks is None:
+        blocks = _local.blocks = []
+    blocks.append(stats)
+    try:
+        yield stats
+    finally:
+        blocks.remove(stats)
+
+    if stats.count > budget:
+        statements = '\n'.join(f'  {times}x {sql}' for sql, times in stats.fingerprints.most_common())
+        raise QueryBudgetExceeded(f'{stats.count} statements, over the budget of {budget}:\n{statements}')
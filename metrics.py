@@ -0,0 +1,295 @@
+# metrics.py
+import bisect
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from flask import g, request
+from instrumentation import collect_request_statements, install
+
+# Upper bounds of the request latency histogram, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Starting size of a worker's metrics file; it doubles when full
+INITIAL_FILE_BYTES = 64 * 1024
+
+# Metric families: name -> (type, help)
+METRICS = {
+    'courtbook_http_requests_total': ('counter', 'Requests served, by route, method and status'),
+    'courtbook_http_request_duration_seconds': ('histogram', 'Request latency by route and method'),
+    'courtbook_http_requests_in_progress': ('gauge', 'Requests being served right now'),
+    'courtbook_db_seconds_total': ('counter', 'Time spent in SQL statements, by route'),
+    'courtbook_db_statements_total': ('counter', 'SQL statements run, by route'),
+    'courtbook_booking_outcomes_total': ('counter', 'Booking requests by outcome'),
+}
+
+_HEADER = struct.Struct('<q')
+_KEY_LENGTH = struct.Struct('<i')
+_VALUE = struct.Struct('<d')
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+
+def _read_entries(data):
+    """(key, value) entries of a metrics file's bytes"""
+    used = _HEADER.unpack_from(data, 0)[0]
+    offset = _HEADER.size
+    while offset < used:
+        key_length = _KEY_LENGTH.unpack_from(data, offset)[0]
+        key = data[offset + _KEY_LENGTH.size:offset + _KEY_LENGTH.size + key_length].decode()
+        offset = _aligned(offset + _KEY_LENGTH.size + key_length)
+        yield key, _VALUE.unpack_from(data, offset)[0]
+        offset += _VALUE.size
+
+
+class FileValues:
+    """Float values by key in a memory-mapped file owned by one worker process.
+
+    Other workers read the file while this one writes it: an entry is written
+    in full before the used length at the start of the file is moved past it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        self._size = INITIAL_FILE_BYTES
+        os.ftruncate(self._fd, self._size)
+        self._map = mmap.mmap(self._fd, self._size)
+        self._used = _HEADER.size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets = {}
+
+    def _append(self, key):
+        encoded = key.encode()
+        value_offset = _aligned(self._used + _KEY_LENGTH.size + len(encoded))
+        end = value_offset + _VALUE.size
+        while end > self._size:
+            self._map.close()
+            self._size *= 2
+            os.ftruncate(self._fd, self._size)
+            self._map = mmap.mmap(self._fd, self._size)
+
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, value_offset, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = value_offset
+        return value_offset
+
+    def add(self, key, amount):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def items(self):
+        return _read_entries(self._map)
+
+
+class MemoryValues:
+    """Float values by key for a single-process server"""
+
+    def __init__(self):
+        self._values = {}
+
+    def add(self, key, amount):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        return list(self._values.items())
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Metrics:
+    """Counters, gauges and histograms, summed over every worker process.
+
+    With COURTBOOK_METRICS_DIR set, each worker (e.g. under gunicorn) keeps its
+    values in metrics-<pid>.db in that directory and a scrape of any worker
+    adds up all the files. Counters of exited workers are kept so totals never
+    go backwards; their gauges are dropped. Clear the directory when the
+    server starts. Without it, values are kept in memory for this process only.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._values = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _store(self):
+        # Opened on first use in each process, so workers forked from a preloaded app get their own file
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                self._values = FileValues(os.path.join(self.directory, f'metrics-{self._pid}.db'))
+            else:
+                self._values = MemoryValues()
+        return self._values
+
+    def inc(self, name, labels, amount=1):
+        key = _key(name, labels)
+        with self._lock:
+            self._store().add(key, amount)
+
+    def observe(self, name, labels, seconds, buckets=LATENCY_BUCKETS):
+        """Add one observation to a histogram; buckets are stored per bound and summed on export"""
+        index = bisect.bisect_left(buckets, seconds)
+        bound = str(buckets[index]) if index < len(buckets) else '+Inf'
+        with self._lock:
+            store = self._store()
+            store.add(_key(name + '_bucket', dict(labels, le=bound)), 1)
+            store.add(_key(name + '_sum', labels), seconds)
+            store.add(_key(name + '_count', labels), 1)
+
+    def _collect(self):
+        """{(sample name, labels): value} over all workers"""
+        with self._lock:
+            own = list(self._store().items())
+
+        sources = [(os.getpid(), own)]
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.db')):
+                pid = int(os.path.basename(path)[len('metrics-'):-len('.db')])
+                if pid == os.getpid():
+                    continue
+                try:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+                if len(data) >= _HEADER.size:
+                    sources.append((pid, list(_read_entries(data))))
+
+        totals = {}
+        for pid, entries in sources:
+            alive = pid == os.getpid() or _pid_alive(pid)
+            for key, value in entries:
+                name, labels = json.loads(key)
+                if not alive and METRICS.get(name, ('counter',))[0] == 'gauge':
+                    continue
+                sample = (name, tuple(tuple(label) for label in labels))
+                totals[sample] = totals.get(sample, 0.0) + value
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        totals = self._collect()
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            if metric_type == 'histogram':
+                lines.extend(_histogram_lines(name, totals))
+            else:
+                for (sample, labels), value in sorted(totals.items()):
+                    if sample == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name, totals):
+    series = sorted({labels for sample, labels in totals if sample == name + '_count'})
+    for labels in series:
+        cumulative = 0.0
+        for bound in [str(bucket) for bucket in LATENCY_BUCKETS] + ['+Inf']:
+            cumulative += totals.get((name + '_bucket', tuple(sorted(labels + (('le', bound),)))), 0.0)
+            yield f'{name}_bucket{_format_labels(labels + (("le", bound),))} {_format_value(cumulative)}'
+        yield f'{name}_sum{_format_labels(labels)} {_format_value(totals[name + "_sum", labels])}'
+        yield f'{name}_count{_format_labels(labels)} {_format_value(totals[name + "_count", labels])}'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in labels)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+metrics = Metrics(os.environ.get('COURTBOOK_METRICS_DIR'))
+
+
+class _DbTime:
+    """SQL statements and time of one request"""
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+    def record(self, statement, seconds):
+        self.statements += 1
+        self.seconds += seconds
+
+
+def _route_labels():
+    return {
+        'blueprint': request.blueprint or 'app',
+        'endpoint': request.endpoint or 'unmatched',
+        'method': request.method
+    }
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_db = _DbTime()
+    collect_request_statements(g.metrics_db)
+    metrics.inc('courtbook_http_requests_in_progress', {})
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _finish_request(exception):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+
+    labels = _route_labels()
+    metrics.inc('courtbook_http_requests_in_progress', {}, -1)
+    metrics.observe('courtbook_http_request_duration_seconds', labels, time.perf_counter() - started)
+    metrics.inc('courtbook_http_requests_total',
+                dict(labels, status=str(500 if exception else g.get('metrics_status', 500))))
+
+    db_time = g.pop('metrics_db')
+    route = {'blueprint': labels['blueprint'], 'endpoint': labels['endpoint']}
+    if db_time.statements:
+        metrics.inc('courtbook_db_statements_total', route, db_time.statements)
+        metrics.inc('courtbook_db_seconds_total', route, db_time.seconds)
+
+
+def record_booking_outcome(outcome):
+    """Count a booking request as confirmed or by the reason it was refused"""
+    metrics.inc('courtbook_booking_outcomes_total', {'outcome': outcome})
+
+
+def init_metrics(app):
+    """Time every request and its SQL for the /metrics endpoint"""
+    install()
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_finish_request)
@@ -0,0 +1,117 @@
+# migrations.py
+from sqlalchemy import text
+from models import db
+from rollups import rebuild_rollups
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied to the data in the database; the message says what to fix"""
+
+
+def _create_indexes(*statements):
+    def migrate():
+        for statement in statements:
+            db.session.execute(text(statement))
+    return migrate
+
+
+def _guard_booking_slots():
+    """Unique court and coach slot indexes, refused while double bookings exist"""
+    clashes = []
+    for column in ('court_id', 'coach_id'):
+        for value, day, time_slot, ids in db.session.execute(text(
+            f'SELECT {column}, date, time_slot, GROUP_CONCAT(id) FROM bookings WHERE {column} IS NOT NULL '
+            f'GROUP BY {column}, date, time_slot HAVING COUNT(*) > 1'
+        )):
+            clashes.append(f'  {column}={value} on {day} at {time_slot}: bookings {ids}')
+
+    if clashes:
+        raise MigrationError(
+            'Double bookings must be resolved before the slot guards can be added. '
+            'Delete or move all but one booking of each:\n' + '\n'.join(clashes)
+        )
+
+    _create_indexes(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_bookings_court_slot ON bookings (court_id, date, time_slot)',
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_bookings_coach_slot ON bookings (coach_id, date, time_slot)',
+    )()
+
+
+def _drop_court_type_rollups():
+    db.session.execute(text("DELETE FROM booking_rollups WHERE dimension = 'court_type'"))
+
+
+# Schema changes for existing database files, in order. create_all builds new
+# databases at the latest schema, so every step must be a no-op on those.
+MIGRATIONS = [
+    (1, 'Unique court and coach slot guards on bookings', _guard_booking_slots),
+    (2, 'Backfill daily booking rollups', rebuild_rollups),
+    (3, 'Indexes for booking history, date scans and equipment lines', _create_indexes(
+        'CREATE INDEX IF NOT EXISTS ix_bookings_user_date ON bookings (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS ix_bookings_date_time_slot ON bookings (date, time_slot)',
+        'CREATE INDEX IF NOT EXISTS ix_booking_equipment_booking_equipment '
+        'ON booking_equipment (booking_id, equipment_id)',
+        'CREATE INDEX IF NOT EXISTS ix_booking_equipment_equipment ON booking_equipment (equipment_id)',
+    )),
+    (4, 'Drop court type rollups; revenue by type is read from the per-court rollups', _drop_court_type_rollups),
+]
+
+
+def get_schema_version():
+    return db.session.execute(text('PRAGMA user_version')).scalar()
+
+
+def run_migrations():
+    """Apply every migration newer than the database's user_version; returns the versions applied.
+
+    Raises MigrationError, with nothing of that migration applied, if the data rules it out.
+    """
+    current = get_schema_version()
+    applied = []
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            migrate()
+        except MigrationError:
+            db.session.rollback()
+            raise
+        db.session.execute(text(f'PRAGMA user_version = {int(version)}'))
+        db.session.commit()
+        applied.append(version)
+        print(f'Applied migration {version}: {description}')
+
+    return applied
+
+
+# Hot queries and the index each one is expected to use
+HOT_QUERIES = [
+    ('Court slot check',
+     'SELECT id FROM bookings WHERE court_id = 1 AND date = \'2025-01-01\' AND time_slot = \'18:00\'',
+     'uq_bookings_court_slot'),
+    ('Coach slot check',
+     'SELECT id FROM bookings WHERE coach_id = 1 AND date = \'2025-01-01\' AND time_slot = \'18:00\'',
+     'uq_bookings_coach_slot'),
+    ('Booking history',
+     'SELECT id FROM bookings WHERE user_id = 1 ORDER BY date DESC',
+     'ix_bookings_user_date'),
+    ('Bookings on a date',
+     'SELECT id, court_id, coach_id FROM bookings WHERE date = \'2025-01-01\'',
+     'ix_bookings_date_time_slot'),
+    ('Equipment lines of a booking',
+     'SELECT quantity FROM booking_equipment WHERE booking_id = 1 AND equipment_id = 1',
+     'ix_booking_equipment_booking_equipment'),
+    ('Expired slot holds',
+     'SELECT id FROM slot_holds WHERE expires_at <= \'2025-01-01 18:00:00\'',
+     'ix_slot_holds_expires_at'),
+]
+
+
+def explain_hot_queries():
+    """EXPLAIN QUERY PLAN of every hot query: [(name, expected index, plan, uses expected index)]"""
+    results = []
+    for name, sql, index in HOT_QUERIES:
+        plan = ' | '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+        results.append((name, index, plan, index in plan))
+    return results
@@ -2,8 +2,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(UserMixin, db.Model):
@@ -59,6 +60,14 @@ class Coach(db.Model):
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # A court or a coach can only be booked once per slot
+        db.Index('uq_bookings_court_slot', 'court_id', 'date', 'time_slot', unique=True),
+        db.Index('uq_bookings_coach_slot', 'coach_id', 'date', 'time_slot', unique=True),
+        # Booking history and date-range scans
+        db.Index('ix_bookings_user_date', 'user_id', 'date'),
+        db.Index('ix_bookings_date_time_slot', 'date', 'time_slot'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -77,12 +86,60 @@ class Booking(db.Model):
 
 class BookingEquipment(db.Model):
     __tablename__ = 'booking_equipment'
+    __table_args__ = (
+        db.Index('ix_booking_equipment_booking_equipment', 'booking_id', 'equipment_id'),
+        db.Index('ix_booking_equipment_equipment', 'equipment_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
     equipment_id = db.Column(db.Integer, db.ForeignKey('equipment.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
 
+    # Relationships
+    equipment_item = db.relationship('Equipment', lazy=True)
+
+
+class SlotHold(db.Model):
+    __tablename__ = 'slot_holds'
+    __table_args__ = (
+        # An unexpired hold keeps other players off the court and coach for the slot
+        db.Index('uq_slot_holds_court_slot', 'court_id', 'date', 'time_slot', unique=True),
+        db.Index('uq_slot_holds_coach_slot', 'coach_id', 'date', 'time_slot', unique=True),
+        db.Index('ix_slot_holds_date_time_slot', 'date', 'time_slot'),
+        # Expired holds are purged with a range scan
+        db.Index('ix_slot_holds_expires_at', 'expires_at'),
+        db.Index('ix_slot_holds_token', 'token'),
+        db.Index('ix_slot_holds_user', 'user_id'),
+    )
+
+    # One row per held slot; the rows of one hold share a token
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(32), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    court_id = db.Column(db.Integer, db.ForeignKey('courts.id'), nullable=False)
+    coach_id = db.Column(db.Integer, db.ForeignKey('coaches.id'), nullable=True)
+    date = db.Column(db.Date, nullable=False)
+    time_slot = db.Column(db.String(10), nullable=False)
+    equipment = db.Column(db.JSON, nullable=False, default=list)  # [[equipment_id, quantity], ...]
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class BookingRollup(db.Model):
+    __tablename__ = 'booking_rollups'
+    __table_args__ = (
+        db.Index('uq_booking_rollups_day_dimension_key', 'day', 'dimension', 'key', unique=True),
+    )
+
+    # Daily booking count and revenue, overall and per court and coach
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)  # 'all', 'court' or 'coach'
+    key = db.Column(db.String(50), nullable=False, default='')  # court or coach id; '' for 'all'
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
 
 class PricingRule(db.Model):
     __tablename__ = 'pricing_rules'
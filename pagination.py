@@ -0,0 +1,20 @@
+# pagination.py
+import base64
+import json
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Sort key values from a cursor made by encode_cursor; raises ValueError if malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
@@ -0,0 +1,189 @@
+# pricing.py
+import math
+from collections import namedtuple
+from models import PricingRule
+from catalog import catalog_cache
+
+
+def round_half_up(value):
+    """Round like JavaScript's Math.round, which the booking page has always used"""
+    return int(math.floor(value + 0.5))
+
+
+def _minutes(hhmm):
+    hour, minute = hhmm.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+PeakHours = namedtuple('PeakHours', ['multiplier', 'start', 'end', 'start_minutes', 'end_minutes', 'days'])
+Bundle = namedtuple('Bundle', ['discount', 'min_items'])
+
+
+class PricingEngine(namedtuple('PricingEngine', ['peak', 'weekend', 'indoor', 'multiple_hours', 'bundle'])):
+    """Immutable evaluator compiled from the enabled PricingRule rows.
+
+    A rule that is disabled or missing is None; otherwise it holds the rule's
+    multiplier or discount.
+    """
+    __slots__ = ()
+
+    def is_peak(self, booking_date, time_slot):
+        if not self.peak:
+            return False
+        if self.peak.days and booking_date.isoweekday() not in self.peak.days:
+            return False
+        return self.peak.start_minutes <= _minutes(time_slot) < self.peak.end_minutes
+
+    def _court_price(self, court, peak, weekend):
+        """Court price with peak/weekend/indoor multipliers"""
+        multiplier = 1
+        if peak:
+            multiplier *= self.peak.multiplier
+        if weekend and self.weekend is not None:
+            multiplier *= self.weekend
+        if self.indoor is not None and court.type == 'indoor':
+            multiplier *= self.indoor
+
+        if multiplier != 1:
+            return round_half_up(court.base_price * multiplier)
+        return court.base_price
+
+    def _extras_price(self, equipment, coach):
+        """Equipment with the bundle discount, plus the coach"""
+        equipment = equipment or {}
+        equipment_total = sum(item.price * quantity for item, quantity in equipment.items())
+        if self.bundle and sum(equipment.values()) >= self.bundle.min_items:
+            equipment_total = round_half_up(equipment_total - equipment_total * self.bundle.discount)
+        return equipment_total + (coach.price if coach else 0)
+
+    def _apply_duration(self, hourly_total, duration):
+        """Duration with the multi-hour discount"""
+        total = round_half_up(hourly_total * duration)
+        if self.multiple_hours is not None and duration > 1:
+            total = round_half_up(total - total * (duration - 1) * self.multiple_hours)
+        return max(0, total)
+
+    def price(self, court, booking_date, time_slot, duration=1, equipment=None, coach=None):
+        """Total price of a booking starting at time_slot; equipment maps Equipment rows to quantities"""
+        court_price = self._court_price(
+            court, self.is_peak(booking_date, time_slot), booking_date.weekday() >= 5
+        )
+        return self._apply_duration(court_price + self._extras_price(equipment, coach), duration)
+
+    def quote_matrix(self, courts, dates, time_slots, duration=1, equipment=None, coach=None):
+        """Price every (date, court, start slot) cell as {date: {court_id: {slot: price}}}.
+
+        The price only varies with the court and with whether the cell is peak
+        and/or weekend, so those few combinations are priced once and every
+        cell becomes a table lookup. Slots too late in the day for the
+        duration are left out.
+        """
+        extras = self._extras_price(equipment, coach)
+        totals = {}
+        for court in courts:
+            for peak in (False, True):
+                for weekend in (False, True):
+                    court_price = self._court_price(court, peak, weekend)
+                    totals[court.id, peak, weekend] = self._apply_duration(court_price + extras, duration)
+
+        start_slots = time_slots[:len(time_slots) - duration + 1]
+        slot_minutes = [_minutes(slot) for slot in start_slots]
+
+        # Peak pattern over the start slots, per ISO weekday
+        peak_by_weekday = {}
+        for weekday in range(1, 8):
+            applies = self.peak and (not self.peak.days or weekday in self.peak.days)
+            peak_by_weekday[weekday] = [
+                bool(applies) and self.peak.start_minutes <= minutes < self.peak.end_minutes
+                for minutes in slot_minutes
+            ]
+
+        matrix = {}
+        for day in dates:
+            peaks = peak_by_weekday[day.isoweekday()]
+            weekend = day.weekday() >= 5
+            matrix[day] = {
+                court.id: {
+                    slot: totals[court.id, peak, weekend] for slot, peak in zip(start_slots, peaks)
+                } for court in courts
+            }
+        return matrix
+
+    def to_client(self):
+        """The rules in the shape the booking page's calculatePrice() expects"""
+        rules = {}
+        if self.peak:
+            rules['peakHours'] = {
+                'enabled': True,
+                'multiplier': self.peak.multiplier,
+                'start': self.peak.start,
+                'end': self.peak.end,
+                'days': sorted(self.peak.days)
+            }
+        if self.weekend is not None:
+            rules['weekend'] = {'enabled': True, 'multiplier': self.weekend}
+        if self.indoor is not None:
+            rules['indoor'] = {'enabled': True, 'multiplier': self.indoor}
+        if self.multiple_hours is not None:
+            rules['multipleHours'] = {'enabled': True, 'discountPerHour': self.multiple_hours}
+        if self.bundle:
+            rules['bundle'] = {
+                'enabled': True,
+                'discount': self.bundle.discount,
+                'minItems': self.bundle.min_items
+            }
+        return rules
+
+
+def parse_apply_days(apply_days):
+    """ISO weekdays (1 = Monday) of a comma-separated apply_days value; raises ValueError if malformed"""
+    days = set()
+    for day in (apply_days or '').split(','):
+        if not day.strip():
+            continue
+        day = int(day)
+        if not 1 <= day <= 7:
+            raise ValueError(f'{day} is not an ISO weekday')
+        days.add(day)
+    return frozenset(days)
+
+
+def _valid_apply_days(apply_days):
+    """Weekdays of apply_days, skipping malformed entries so a bad row cannot break pricing"""
+    days = set()
+    for day in (apply_days or '').split(','):
+        try:
+            days |= parse_apply_days(day)
+        except ValueError:
+            continue
+    return frozenset(days)
+
+
+def compile_rules(rules):
+    """Compile PricingRule rows into a PricingEngine; disabled rules are skipped"""
+    compiled = dict.fromkeys(PricingEngine._fields)
+
+    for rule in rules:
+        if not rule.enabled:
+            continue
+
+        if rule.rule_type == 'peak_hours':
+            start = rule.start_time or '18:00'
+            end = rule.end_time or '21:00'
+            days = _valid_apply_days(rule.apply_days)
+            compiled['peak'] = PeakHours(rule.multiplier, start, end, _minutes(start), _minutes(end), days)
+        elif rule.rule_type == 'weekend':
+            compiled['weekend'] = rule.multiplier
+        elif rule.rule_type == 'indoor':
+            compiled['indoor'] = rule.multiplier
+        elif rule.rule_type == 'multiple_hours':
+            compiled['multiple_hours'] = rule.discount
+        elif rule.rule_type == 'bundle':
+            compiled['bundle'] = Bundle(rule.discount, rule.min_items or 3)
+
+    return PricingEngine(**compiled)
+
+
+def get_pricing_engine():
+    """Return the compiled engine for the current catalog version, compiling it if needed"""
+    return catalog_cache.get('pricing_engine', lambda: compile_rules(PricingRule.query.all()))
@@ -0,0 +1,130 @@
+# reports.py
+import threading
+import time
+from collections import OrderedDict
+from models import db, Booking, BookingRollup, Court, User
+
+# How long a cached report is served when no booking in its window changes
+REPORT_CACHE_TTL_SECONDS = 300
+
+# Windows kept in the cache; the least recently used is dropped beyond this
+MAX_CACHED_REPORTS = 64
+
+
+class ReportCache:
+    """Reports cached per (start_date, end_date) window, with a bounded LRU over windows.
+
+    Either bound of a window may be None for open-ended.
+    """
+
+    def __init__(self, ttl=REPORT_CACHE_TTL_SECONDS, max_reports=MAX_CACHED_REPORTS):
+        self.ttl = ttl
+        self.max_reports = max_reports
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, window):
+        with self._lock:
+            cached = self._reports.get(window)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self._reports[window]
+                return None
+            self._reports.move_to_end(window)
+            return cached[1]
+
+    def put(self, window, report):
+        with self._lock:
+            self._reports[window] = (time.monotonic() + self.ttl, report)
+            self._reports.move_to_end(window)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+
+    def invalidate(self, dates):
+        """Drop every cached window that contains one of the given booking dates"""
+        with self._lock:
+            for window in list(self._reports):
+                start, end = window
+                if any((start is None or day >= start) and (end is None or day <= end) for day in dates):
+                    del self._reports[window]
+
+
+revenue_report_cache = ReportCache()
+
+
+def _in_window(column, start_date, end_date):
+    criteria = []
+    if start_date:
+        criteria.append(column >= start_date)
+    if end_date:
+        criteria.append(column <= end_date)
+    return criteria
+
+
+def build_revenue_report(start_date=None, end_date=None):
+    """Revenue report with the date window applied to every section"""
+    window = _in_window(BookingRollup.day, start_date, end_date)
+
+    total_bookings, total_revenue = db.session.query(
+        db.func.sum(BookingRollup.bookings),
+        db.func.sum(BookingRollup.revenue)
+    ).filter(BookingRollup.dimension == 'all', *window).one()
+
+    # Get revenue by court type, from the per-court rollups so a court's current type applies
+    revenue_by_court = db.session.query(
+        Court.type,
+        db.func.sum(BookingRollup.revenue)
+    ).join(Court, BookingRollup.key == db.cast(Court.id, db.String)).filter(
+        BookingRollup.dimension == 'court', *window
+    ).group_by(Court.type).having(db.func.sum(BookingRollup.bookings) > 0).all()
+
+    # Get revenue by month
+    month = db.func.strftime('%Y-%m', BookingRollup.day)
+    revenue_by_month = db.session.query(
+        month,
+        db.func.sum(BookingRollup.bookings),
+        db.func.sum(BookingRollup.revenue)
+    ).filter(BookingRollup.dimension == 'all', *window).group_by(month).having(
+        db.func.sum(BookingRollup.bookings) > 0
+    ).order_by(month.desc()).limit(12).all()
+
+    # Get top users by spending
+    top_users = db.session.query(
+        User.username,
+        db.func.count(Booking.id).label('booking_count'),
+        db.func.sum(Booking.total_price).label('total_spent')
+    ).join(Booking).filter(*_in_window(Booking.date, start_date, end_date)).group_by(User.id).order_by(
+        db.func.sum(Booking.total_price).desc()
+    ).limit(10).all()
+
+    return {
+        'totalRevenue': total_revenue or 0,
+        'totalBookings': total_bookings or 0,
+        'revenueByCourt': [
+            {'type': court_type, 'revenue': revenue}
+            for court_type, revenue in revenue_by_court
+        ],
+        'revenueByMonth': [
+            {'month': month, 'bookings': count, 'revenue': revenue}
+            for month, count, revenue in revenue_by_month
+        ],
+        'topUsers': [
+            {'username': username, 'bookings': count, 'totalSpent': spent}
+            for username, count, spent in top_users
+        ]
+    }
+
+
+def get_revenue_report(start_date=None, end_date=None):
+    """Cached revenue report for the window"""
+    window = (start_date, end_date)
+    report = revenue_report_cache.get(window)
+    if report is None:
+        report = build_revenue_report(start_date, end_date)
+        revenue_report_cache.put(window, report)
+    return report
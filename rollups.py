@@ -0,0 +1,67 @@
+# rollups.py
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Booking, BookingRollup
+
+
+def _dimensions(court_id, coach_id):
+    yield 'all', ''
+    yield 'court', str(court_id)
+    if coach_id:
+        yield 'coach', str(coach_id)
+
+
+def apply_to_rollups(rows, sign=1):
+    """Add bookings to the daily rollups, or remove them with sign=-1, in the current transaction.
+
+    rows are (date, court_id, coach_id, total_price) tuples. Revenue by court type is
+    read from the per-court rows at report time, so a court changing type needs no rebuild.
+    """
+    deltas = {}
+    for day, court_id, coach_id, total_price in rows:
+        for dimension, key in _dimensions(court_id, coach_id):
+            count, revenue = deltas.get((day, dimension, key), (0, 0))
+            deltas[day, dimension, key] = (count + sign, revenue + sign * total_price)
+
+    if not deltas:
+        return
+
+    statement = insert(BookingRollup).values([
+        {'day': day, 'dimension': dimension, 'key': key, 'bookings': count, 'revenue': revenue}
+        for (day, dimension, key), (count, revenue) in deltas.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=['day', 'dimension', 'key'],
+        set_={
+            'bookings': BookingRollup.bookings + statement.excluded.bookings,
+            'revenue': BookingRollup.revenue + statement.excluded.revenue
+        }
+    )
+    db.session.execute(statement)
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the bookings table"""
+    BookingRollup.query.delete()
+
+    breakdowns = [
+        ('all', db.literal('')),
+        ('court', db.cast(Booking.court_id, db.String)),
+        ('coach', db.cast(Booking.coach_id, db.String)),
+    ]
+    for dimension, key in breakdowns:
+        grouped = db.session.query(
+            Booking.date,
+            db.literal(dimension),
+            key,
+            db.func.count(Booking.id),
+            db.func.sum(Booking.total_price)
+        ).group_by(Booking.date, key)
+
+        if dimension == 'coach':
+            grouped = grouped.filter(Booking.coach_id.isnot(None))
+
+        db.session.execute(
+            insert(BookingRollup).from_select(['day', 'dimension', 'key', 'bookings', 'revenue'], grouped)
+        )
+
+    db.session.commit()
@@ -0,0 +1,33 @@
+# routing.py
+from flask import g, has_app_context, request, current_app
+from flask_sqlalchemy.session import Session
+
+# SQLALCHEMY_BINDS key of the read-only engine on the same database file
+READ_BIND_KEY = 'read'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """db.session that sends a read-only request's statements to the read engine.
+
+    Flushes always go to the write engine, so a view that does write still
+    gets a write connection; anything else writing from a read-only request
+    fails on the read engine's query_only connection.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('db_read_only'):
+            engine = self._db.engines.get(READ_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def select_engine_for_request():
+    """before_request hook: read-only engine for safe methods unless the view overrides it"""
+    view = current_app.view_functions.get(request.endpoint)
+    access = getattr(view, 'db_access', None)
+    if access is None:
+        g.db_read_only = request.method in READ_METHODS
+    else:
+        g.db_read_only = access == 'read'
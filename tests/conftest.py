@@ -0,0 +1,37 @@
+# tests/conftest.py
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app binds its database when app.py is imported, so point it at a scratch file first
+DATABASE_DIR = tempfile.mkdtemp(prefix='courtbook-tests-')
+os.environ['COURTBOOK_DATABASE_URI'] = 'sqlite:///' + os.path.join(DATABASE_DIR, 'courtbook.db')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    from database import seed_data
+
+    with app.app_context():
+        seed_data()
+    yield app
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def admin_client(app):
+    """Test client logged in as an admin"""
+    from models import db, User
+
+    client = app.test_client()
+    client.post('/signup', json={'username': 'admin', 'email': 'admin@example.com', 'password': 'secret'})
+    with app.app_context():
+        User.query.filter_by(username='admin').update({'is_admin': True})
+        db.session.commit()
+    return client
@@ -0,0 +1,143 @@
+# tests/test_admin.py
+from datetime import date, timedelta
+from instrumentation import assert_max_queries
+
+# Booking counts come from one grouped subquery, so a listing's statements are fixed:
+# the logged-in user, the rows, and for paginated listings the total
+LISTING_STATEMENTS = {
+    '/admin/api/users?per_page=100': 3,
+    '/admin/api/courts': 2,
+    '/admin/api/coaches': 2,
+}
+
+FIRST_DAY = date(2031, 5, 1)
+
+
+def add_players_courts_and_coaches(app, count):
+    """count new users, courts and coaches, each with a past and an upcoming booking"""
+    from models import db, Booking, Coach, Court, User
+
+    with app.app_context():
+        offset = User.query.count()
+        for i in range(offset, offset + count):
+            user = User(username=f'player{i}', email=f'player{i}@example.com', password_hash='-')
+            court = Court(name=f'Test Court {i}', type='indoor', base_price=600, is_active=True)
+            coach = Coach(name=f'Test Coach {i}', price=500, specialization='Testing')
+            db.session.add_all([user, court, coach])
+            db.session.flush()
+            db.session.add_all([
+                Booking(user_id=user.id, court_id=court.id, coach_id=coach.id, date=day, time_slot='10:00',
+                        total_price=1100)
+                for day in (date.today() - timedelta(days=7), FIRST_DAY)
+            ])
+        db.session.commit()
+
+
+def listing_statements(client, url):
+    with assert_max_queries(LISTING_STATEMENTS[url]) as stats:
+        response = client.get(url)
+    assert response.status_code == 200
+    return stats.count, response.get_json()
+
+
+def test_admin_listing_statements_do_not_grow_with_rows(app, admin_client):
+    add_players_courts_and_coaches(app, 3)
+    few = {url: listing_statements(admin_client, url)[0] for url in LISTING_STATEMENTS}
+
+    add_players_courts_and_coaches(app, 30)
+    many = {url: listing_statements(admin_client, url) for url in LISTING_STATEMENTS}
+
+    assert {url: statements for url, (statements, _) in many.items()} == few
+
+    # The counts still come through per row
+    _, coaches = many['/admin/api/coaches']
+    test_coaches = [coach for coach in coaches if coach['name'].startswith('Test Coach')]
+    assert len(test_coaches) == 33
+    assert all(coach['totalBookings'] == 2 and coach['upcomingBookings'] == 1 for coach in test_coaches)
+
+    _, users = many['/admin/api/users?per_page=100']
+    assert all(user['totalBookings'] == 2 for user in users['users'] if user['username'].startswith('player'))
+
+
+def test_admin_deletes_a_booking_and_a_user(app, admin_client):
+    from models import Booking, BookingEquipment, BookingRollup, User
+
+    player = app.test_client()
+    player.post('/signup', json={'username': 'leaving', 'email': 'leaving@example.com', 'password': 'secret'})
+    booking_ids = []
+    for time_slot in ('10:00', '11:00'):
+        response = player.post('/api/bookings', json={
+            'court': {'id': 1}, 'coach': {'id': 1}, 'date': '2031-07-01', 'timeSlot': time_slot,
+            'equipment': {'1': 1}
+        })
+        assert response.get_json()['success']
+        booking_ids.append(response.get_json()['booking_id'])
+
+    def day_bookings():
+        with app.app_context():
+            rollup = BookingRollup.query.filter_by(day=date(2031, 7, 1), dimension='all').first()
+            return rollup.bookings if rollup else 0
+
+    assert day_bookings() == 2
+
+    response = admin_client.delete(f'/admin/api/bookings/{booking_ids[0]}')
+    assert response.status_code == 200 and response.get_json()['success']
+    assert day_bookings() == 1
+    available = admin_client.get('/api/check_availability?date=2031-07-01&time=10:00').get_json()
+    assert 1 not in available['booked_courts']
+
+    with app.app_context():
+        user_id = User.query.filter_by(username='leaving').one().id
+    response = admin_client.delete(f'/admin/api/users/{user_id}')
+    assert response.status_code == 200 and response.get_json()['success']
+    assert day_bookings() == 0
+
+    with app.app_context():
+        assert User.query.get(user_id) is None
+        assert Booking.query.filter(Booking.id.in_(booking_ids)).count() == 0
+        assert BookingEquipment.query.filter(BookingEquipment.booking_id.in_(booking_ids)).count() == 0
+
+
+def test_revenue_by_court_type_follows_court_type_changes(app, admin_client):
+    court = admin_client.post('/admin/api/courts', json={
+        'name': 'Retyped Court', 'type': 'outdoor', 'basePrice': 500
+    }).get_json()['court']
+    response = admin_client.post('/api/bookings', json={
+        'court': {'id': court['id']}, 'date': '2031-09-01', 'timeSlot': '10:00'
+    })
+    booking_id = response.get_json()['booking_id']
+
+    def revenue_by_type():
+        report = admin_client.get('/admin/api/reports/revenue?start_date=2031-09-01&end_date=2031-09-01')
+        return {row['type']: row['revenue'] for row in report.get_json()['revenueByCourt']}
+
+    price = revenue_by_type()['outdoor']
+    admin_client.put(f'/admin/api/courts/{court["id"]}', json={'type': 'indoor'})
+    assert revenue_by_type() == {'indoor': price}
+
+    admin_client.delete(f'/admin/api/bookings/{booking_id}')
+    assert revenue_by_type() == {}
+
+
+def test_pricing_rules_reject_bad_apply_days(app, admin_client):
+    from models import db, PricingRule
+    from catalog import catalog_cache
+
+    response = admin_client.put('/admin/api/pricing-rules', json={
+        'rules': [{'ruleType': 'peak_hours', 'applyDays': 'Mon,Tue'}]
+    })
+    assert response.status_code == 400
+
+    # A bad value already stored is skipped rather than failing every price lookup
+    with app.app_context():
+        PricingRule.query.filter_by(rule_type='peak_hours').update({'apply_days': '1,Tue,9'})
+        db.session.commit()
+    catalog_cache.bump()
+    try:
+        assert admin_client.get('/api/bootstrap').status_code == 200
+        assert admin_client.get('/api/pricing_rules').status_code == 200
+    finally:
+        with app.app_context():
+            PricingRule.query.filter_by(rule_type='peak_hours').update({'apply_days': '1,2,3,4,5'})
+            db.session.commit()
+        catalog_cache.bump()
@@ -0,0 +1,68 @@
+# tests/test_availability.py
+from datetime import date
+from instrumentation import assert_max_queries
+
+# Statements of one cold /api/check_availability request: the logged-in user,
+# the date's bookings and equipment lines, held slots, and the equipment list
+CHECK_AVAILABILITY_STATEMENTS = 4
+
+QUIET_DAY = date(2031, 3, 3)
+BUSY_DAY = date(2031, 3, 4)
+
+
+def add_bookings(app, day, count):
+    """count bookings on day, each on its own court and slot and with two equipment lines.
+
+    Returns the stock of the two booked items.
+    """
+    from availability import TIME_SLOTS
+    from models import db, Booking, BookingEquipment, Court, Equipment, User
+
+    with app.app_context():
+        user_id = User.query.first().id
+        # The four seeded courts; other tests add more
+        court_ids = [court.id for court in Court.query.order_by(Court.id).limit(4)]
+        equipment_ids = [item.id for item in Equipment.query.order_by(Equipment.id)][:2]
+        slots = [(court_id, time_slot) for time_slot in TIME_SLOTS for court_id in court_ids]
+        assert count <= len(slots)
+
+        bookings = [
+            Booking(user_id=user_id, court_id=court_id, date=day, time_slot=time_slot, total_price=600)
+            for court_id, time_slot in slots[:count]
+        ]
+        db.session.add_all(bookings)
+        db.session.flush()
+        db.session.add_all([
+            BookingEquipment(booking_id=booking.id, equipment_id=equipment_id, quantity=1)
+            for booking in bookings
+            for equipment_id in equipment_ids
+        ])
+        db.session.commit()
+        return {item.id: item.total_available for item in Equipment.query if item.id in equipment_ids}
+
+
+def check_availability_statements(client, day):
+    with assert_max_queries(CHECK_AVAILABILITY_STATEMENTS) as stats:
+        response = client.get(f'/api/check_availability?date={day.isoformat()}&time=18:00')
+    assert response.status_code == 200
+    return stats.count, response.get_json()
+
+
+def test_check_availability_statements_do_not_grow_with_bookings(app, admin_client):
+    add_bookings(app, QUIET_DAY, 6)
+    stock = add_bookings(app, BUSY_DAY, 60)
+
+    quiet_statements, _ = check_availability_statements(admin_client, QUIET_DAY)
+    busy_statements, busy = check_availability_statements(admin_client, BUSY_DAY)
+
+    assert busy_statements == quiet_statements
+    # Every court is taken at 18:00 on the busy day, each booking with one of both items
+    assert len(busy['booked_courts']) == 4
+    for equipment_id, total_available in stock.items():
+        assert busy['equipment_availability'][str(equipment_id)] == total_available - 4
+
+
+def test_check_availability_rejects_a_malformed_date(admin_client):
+    response = admin_client.get('/api/check_availability?date=03/04/2031&time=18:00')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'Dates must be YYYY-MM-DD'}
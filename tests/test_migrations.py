@@ -0,0 +1,77 @@
+# tests/test_migrations.py
+from sqlalchemy import text
+
+# Indexes the migrations add to database files created before them
+MIGRATED_INDEXES = [
+    'uq_bookings_court_slot',
+    'uq_bookings_coach_slot',
+    'ix_bookings_user_date',
+    'ix_bookings_date_time_slot',
+    'ix_booking_equipment_booking_equipment',
+    'ix_booking_equipment_equipment',
+]
+
+
+def index_names():
+    from models import db
+
+    return {name for name, in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+def rollup_totals():
+    """{dimension: (bookings, revenue)} over every rollup row"""
+    from models import db
+
+    return dict((dimension, (count, revenue)) for dimension, count, revenue in db.session.execute(text(
+        'SELECT dimension, SUM(bookings), SUM(revenue) FROM booking_rollups GROUP BY dimension'
+    )))
+
+
+def booking_totals():
+    """The rollup totals the bookings table calls for"""
+    from models import db
+
+    everything = tuple(db.session.execute(text('SELECT COUNT(*), SUM(total_price) FROM bookings')).one())
+    coached = tuple(db.session.execute(text(
+        'SELECT COUNT(*), SUM(total_price) FROM bookings WHERE coach_id IS NOT NULL'
+    )).one())
+    return {'all': everything, 'court': everything, 'coach': coached}
+
+
+def test_hot_queries_use_their_indexes(app):
+    from migrations import explain_hot_queries
+
+    with app.app_context():
+        results = explain_hot_queries()
+
+    assert [name for name, _, _, _ in results]
+    assert [(name, index, plan) for name, index, plan, uses_index in results if not uses_index] == []
+
+
+def test_migrations_upgrade_an_old_schema(app, admin_client):
+    from migrations import MIGRATIONS, explain_hot_queries, get_schema_version, run_migrations
+    from models import db
+
+    admin_client.post('/api/bookings', json={
+        'court': {'id': 1}, 'coach': {'id': 1}, 'date': '2031-11-03', 'timeSlot': '10:00', 'equipment': {'1': 1}
+    })
+
+    with app.app_context():
+        # The schema before any migration: no indexes, no rollups, user_version 0
+        for index in MIGRATED_INDEXES:
+            db.session.execute(text(f'DROP INDEX {index}'))
+        db.session.execute(text('DELETE FROM booking_rollups'))
+        db.session.execute(text('PRAGMA user_version = 0'))
+        db.session.commit()
+        assert not index_names() & set(MIGRATED_INDEXES)
+
+        applied = run_migrations()
+
+        assert applied == [version for version, _, _ in MIGRATIONS]
+        assert get_schema_version() == applied[-1]
+        assert set(MIGRATED_INDEXES) <= index_names()
+        assert rollup_totals() == booking_totals()
+        assert all(uses_index for _, _, _, uses_index in explain_hot_queries())
+
+        # Up to date: running again changes nothing
+        assert run_migrations() == []